@@ -1,7 +1,21 @@
 import discord
 from discord.ext import commands
-import aiosqlite
+import os
 import time
+from utils.db import avis_leaderboard, avis_stats
+
+# Nombre minimum d'avis pour apparaître dans le classement
+AVIS_MIN_COUNT = int(os.getenv("AVIS_MIN_COUNT", "3"))
+
+def format_histogram(buckets: dict) -> str:
+    # Une ligne par demi-étoile, de 5.0 à 0.5
+    peak = max(buckets.values(), default=0)
+    lines = []
+    for bucket in range(10, 0, -1):
+        count = buckets.get(bucket, 0)
+        bar = "█" * round(10 * count / peak) if peak else ""
+        lines.append(f"{bucket / 2:.1f} {bar:<10} {count}")
+    return "\n".join(lines)
 
 class AvisModal(discord.ui.Modal, title="⭐ Donner un avis sur un staff"):
     def __init__(self, staff: discord.Member, channel: discord.TextChannel):
@@ -35,12 +49,10 @@ class AvisModal(discord.ui.Modal, title="⭐ Donner un avis sur un staff"):
             return
 
         # === Sauvegarde en DB (optionnel mais propre) ===
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute(
-                "INSERT INTO avis (user_id, staff_id, content, stars, guild_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-                (str(interaction.user.id), str(self.staff.id), self.comment.value, stars, str(interaction.guild.id), int(time.time()))
-            )
-            await db.commit()
+        interaction.client.db.append(
+            "INSERT INTO avis (user_id, staff_id, content, stars, guild_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            (str(interaction.user.id), str(self.staff.id), self.comment.value, stars, str(interaction.guild.id), int(time.time()))
+        )
 
         # === Génération du message visuel demandé ===
         full = int(stars)
@@ -74,23 +86,18 @@ class AvisStaff(commands.Cog):
     @discord.app_commands.command(name="avis", description="Donner un avis sur un membre du staff")
     async def avis(self, interaction: discord.Interaction, staff: discord.Member):
         # Récupérer la config du serveur
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute(
-                "SELECT staff_role_id, avis_channel_id FROM avis_config WHERE guild_id = ?",
-                (str(interaction.guild.id),)
-            )
-            row = await cursor.fetchone()
+        config = await self.bot.config.get("avis", str(interaction.guild.id))
 
-        if not row or not row[0]:
+        if not config.staff_role_id:
             await interaction.response.send_message("`⚙️ Le rôle staff n'est pas configuré. Utilisez /avis_role.`", ephemeral=True)
             return
 
-        staff_role = interaction.guild.get_role(int(row[0]))
-        if not staff_role or staff not in staff_role.members:
+        # Recherche dans les rôles du membre (pas de parcours de role.members)
+        if staff.get_role(int(config.staff_role_id)) is None:
             await interaction.response.send_message("`❌ Ce membre n'est pas du staff.`", ephemeral=True)
             return
 
-        channel_id = row[1]
+        channel_id = config.avis_channel_id
         if not channel_id:
             await interaction.response.send_message("`⚙️ Le salon d'avis n'est pas configuré. Utilisez /avis_channel.`", ephemeral=True)
             return
@@ -105,27 +112,50 @@ class AvisStaff(commands.Cog):
     @discord.app_commands.command(name="avis_role", description="Définir le rôle staff")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def avis_role(self, interaction: discord.Interaction, role: discord.Role):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO avis_config (guild_id, staff_role_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET staff_role_id = excluded.staff_role_id
-            """, (str(interaction.guild.id), str(role.id)))
-            await db.commit()
+        await self.bot.config.set("avis", str(interaction.guild.id), staff_role_id=str(role.id))
         await interaction.response.send_message(f"`✅ Rôle staff défini : {role.name}`", ephemeral=True)
 
     @discord.app_commands.command(name="avis_channel", description="Définir le salon pour les avis")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def avis_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO avis_config (guild_id, avis_channel_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET avis_channel_id = excluded.avis_channel_id
-            """, (str(interaction.guild.id), str(channel.id)))
-            await db.commit()
+        await self.bot.config.set("avis", str(interaction.guild.id), avis_channel_id=str(channel.id))
         await interaction.response.send_message(f"`✅ Salon d'avis défini : {channel.mention}`", ephemeral=True)
 
+    @discord.app_commands.command(name="avis_stats", description="Statistiques d'avis d'un membre du staff")
+    @discord.app_commands.describe(jours="Limiter aux N derniers jours (1 à 365)")
+    async def avis_stats(self, interaction: discord.Interaction, staff: discord.Member, jours: discord.app_commands.Range[int, 1, 365] = None):
+        count, average, buckets, last = await avis_stats(
+            self.bot.db, str(interaction.guild.id), str(staff.id), jours
+        )
+        period = f" sur {jours} jours" if jours else ""
+        if not count:
+            await interaction.response.send_message(f"`📭 Aucun avis pour {staff.display_name}{period}.`", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"⭐ Avis de {staff.display_name}{period}", color=0xFFCE00)
+        embed.add_field(name="Moyenne", value=f"`{average:.2f}/5`")
+        embed.add_field(name="Avis", value=f"`{count}`")
+        if last:
+            embed.add_field(name="Dernier avis", value=f"<t:{last}:R>")
+        if buckets:
+            embed.add_field(name="Répartition", value=f"```\n{format_histogram(buckets)}\n```", inline=False)
+        await interaction.response.send_message(embed=embed)
+
+    @discord.app_commands.command(name="avis_top", description="Classement du staff selon les avis")
+    @discord.app_commands.describe(jours="Limiter aux N derniers jours (1 à 365)")
+    async def avis_top(self, interaction: discord.Interaction, jours: discord.app_commands.Range[int, 1, 365] = None):
+        rows = await avis_leaderboard(self.bot.db, str(interaction.guild.id), jours, AVIS_MIN_COUNT)
+        period = f" ({jours} derniers jours)" if jours else ""
+        if not rows:
+            await interaction.response.send_message(
+                f"`📭 Aucun staff avec au moins {AVIS_MIN_COUNT} avis{period}.`", ephemeral=True
+            )
+            return
+        lines = [f"`🏆 Classement du staff{period} :`"]
+        for rank, (staff_id, count, average) in enumerate(rows, start=1):
+            lines.append(f"`{rank}.` <@{staff_id}> — `{average:.2f}/5` ({count} avis)")
+        await interaction.response.send_message("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
+
 # ========== SETUP ==========
 async def setup(bot):
     await bot.add_cog(AvisStaff(bot))
\ No newline at end of file
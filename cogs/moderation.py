@@ -1,8 +1,12 @@
+import asyncio
 import discord
 from discord.ext import commands
-import aiosqlite
+import os
 import re
-import time
+from datetime import timedelta
+from time import time as now
+from utils.db import moderation_page
+from utils.scheduler import SanctionScheduler
 
 def parse_time(time_str):
     # Ex: "30m", "2h", "1d"
@@ -17,104 +21,594 @@ def parse_time(time_str):
         elif unit == 'd': seconds += amount * 86400
     return seconds or None
 
+PAGE_SIZE = 10
+# Durée max d'un timeout Discord (28 jours) ; au-delà la durée est ramenée à ce plafond
+MAX_TIMEOUT = 28 * 86400
+MUTELIST_LIMIT = 25
+
+# Sanctions de masse
+BULK_MAX = int(os.getenv("BULK_MAX", "500"))
+# Appels REST simultanés ; discord.py gère déjà l'attente par bucket (429)
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "5"))
+# discord.py >= 2.4 : jusqu'à 200 bans par appel
+BULK_BAN_CHUNK = 200
+PROGRESS_INTERVAL = 2.0
+
+SANCTION_ICONS = {"ban": "🔨", "mute": "🔇", "warn": "⚠️"}
+
+def format_ban(row):
+    _, user_id, mod_id, _, reason, duration, _ = row
+    return f"• <@{user_id}> — par <@{mod_id}> | `{duration}` | `{reason}`"
+
+def format_warn(row):
+    _, user_id, mod_id, _, reason, _, _ = row
+    return f"• <@{user_id}> — par <@{mod_id}> : `{reason}`"
+
+def format_history(row):
+    _, _, mod_id, action, reason, duration, timestamp = row
+    extra = f" ({duration})" if duration else ""
+    return f"• <t:{timestamp}:d> `{action}{extra}` — par <@{mod_id}> : `{reason}`"
+
+def mute_seconds(duration: str = None):
+    """Durée du timeout en secondes, plafonnée ; None si le format est invalide."""
+    if not duration:
+        return MAX_TIMEOUT
+    seconds = parse_time(duration)
+    return min(seconds, MAX_TIMEOUT) if seconds else None
+
+class BanIndex:
+    """Liste des bans par serveur gardée en mémoire.
+
+    Remplie une seule fois par serveur (guild.bans() au premier besoin), puis
+    tenue à jour par on_member_ban / on_member_unban : un déban ou une
+    autocomplétion ne parcourt plus la liste côté API.
+    """
+
+    def __init__(self):
+        self._bans = {}      # serveur → {user_id: "nom"}
+        self._loading = {}   # serveur → tâche de chargement en cours
+        self._pending = {}   # serveur → événements reçus pendant le chargement
+
+    def loaded(self, guild_id: int) -> bool:
+        return guild_id in self._bans
+
+    async def ensure(self, guild: discord.Guild) -> dict:
+        bans = self._bans.get(guild.id)
+        if bans is not None:
+            return bans
+        # Un seul chargement par serveur, même si plusieurs commandes arrivent en même temps
+        task = self._loading.get(guild.id)
+        if task is None:
+            self._pending[guild.id] = []
+            task = asyncio.create_task(self._load(guild))
+            self._loading[guild.id] = task
+            task.add_done_callback(lambda _: self._loading.pop(guild.id, None))
+        return await asyncio.shield(task)
+
+    def preload(self, guild: discord.Guild):
+        # Pour l'autocomplétion : lance le chargement sans l'attendre
+        if not self.loaded(guild.id) and guild.id not in self._loading:
+            task = asyncio.create_task(self.ensure(guild))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _load(self, guild: discord.Guild) -> dict:
+        try:
+            bans = {entry.user.id: str(entry.user) async for entry in guild.bans(limit=None)}
+        finally:
+            pending = self._pending.pop(guild.id)
+        self._bans[guild.id] = bans
+        # Rejoue les bans/débans arrivés pendant le parcours
+        for user_id, name in pending:
+            if name is None:
+                bans.pop(user_id, None)
+            else:
+                bans[user_id] = name
+        return bans
+
+    def add(self, guild_id: int, user):
+        if guild_id in self._bans:
+            self._bans[guild_id][user.id] = str(user)
+        elif guild_id in self._pending:
+            self._pending[guild_id].append((user.id, str(user)))
+
+    def remove(self, guild_id: int, user_id: int):
+        bans = self._bans.get(guild_id)
+        if bans is not None:
+            bans.pop(user_id, None)
+        elif guild_id in self._pending:
+            self._pending[guild_id].append((user_id, None))
+
+    def find(self, guild_id: int, name: str):
+        name = name.lower()
+        for user_id, user_name in self._bans.get(guild_id, {}).items():
+            if user_name.lower() == name:
+                return user_id
+        return None
+
+    def search(self, guild_id: int, query: str, limit: int = 25) -> list:
+        query = query.lower()
+        matches = []
+        for user_id, name in self._bans.get(guild_id, {}).items():
+            if query in name.lower() or str(user_id).startswith(query):
+                matches.append((name, user_id))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+class HistoryView(discord.ui.View):
+    """Liste paginée par boutons ; chaque page est une requête indexée."""
+
+    def __init__(self, db, guild_id: str, title: str, empty: str, formatter, action: str = None, user_id: str = None):
+        super().__init__(timeout=180)
+        self.db = db
+        self.guild_id = guild_id
+        self.title = title
+        self.empty = empty
+        self.formatter = formatter
+        self.action = action
+        self.user_id = user_id
+        # Curseur de début de chaque page déjà vue (None = première page)
+        self.cursors = [None]
+        self.page = 0
+        self.rows = []
+
+    async def load(self):
+        rows = await moderation_page(
+            self.db, self.guild_id, self.action, self.user_id,
+            before=self.cursors[self.page], limit=PAGE_SIZE + 1
+        )
+        has_next = len(rows) > PAGE_SIZE
+        self.rows = rows[:PAGE_SIZE]
+        if has_next and len(self.cursors) == self.page + 1:
+            last = self.rows[-1]
+            self.cursors.append((last[6], last[0]))
+        self.previous.disabled = self.page == 0
+        self.next.disabled = not has_next
+
+    def render(self) -> str:
+        if not self.rows:
+            return self.empty
+        lines = [f"`{self.title} (page {self.page + 1}) :`"]
+        lines.extend(self.formatter(row) for row in self.rows)
+        return "\n".join(lines)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self.load()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self.load()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.scheduler = SanctionScheduler(
+            bot.db, {"ban": self.lift_ban, "mute": self.lift_mute}, ready=bot.wait_until_ready
+        )
+        # Mutes actifs : serveur → {membre: (expires_at, mod_id, raison)}
+        self.mutes = {}
+        self.bans = BanIndex()
+        self._legacy_checked = False
+
+    async def cog_load(self):
+        rows = await self.bot.db.fetchall(
+            "SELECT guild_id, user_id, mod_id, reason, MAX(expires_at) FROM moderation "
+            "WHERE action = 'mute' AND active = 1 AND expires_at > ? GROUP BY guild_id, user_id",
+            (int(now()),)
+        )
+        for guild_id, user_id, mod_id, reason, expires_at in rows:
+            self.mutes.setdefault(guild_id, {})[user_id] = (expires_at, mod_id, reason)
+        # Recharge les échéances en cours (et rattrape celles dépassées)
+        await self.scheduler.start()
+
+    async def cog_unload(self):
+        self.scheduler.stop()
+
+    async def record_sanction(self, guild_id, user_id, mod_id, action: str, reason: str,
+                              duration: str = None, seconds: int = None):
+        """Enregistre une sanction ; si elle est temporaire, planifie sa levée."""
+        await self.record_sanctions(guild_id, [user_id], mod_id, action, reason, duration, seconds)
+
+    async def record_sanctions(self, guild_id, user_ids, mod_id, action: str, reason: str,
+                               duration: str = None, seconds: int = None):
+        """Même chose pour plusieurs membres ; les lignes partent en écriture
+        différée, regroupées dans une seule transaction."""
+        timestamp = int(now())
+        expires_at = timestamp + seconds if seconds else None
+        if expires_at is None and action in self.scheduler.handlers:
+            # Sanction définitive : elle remplace une éventuelle levée programmée
+            for user_id in user_ids:
+                self.scheduler.cancel(str(guild_id), str(user_id), action)
+                self.bot.db.append(
+                    "UPDATE moderation SET active = 0 "
+                    "WHERE guild_id = ? AND user_id = ? AND +action = ? AND +active = 1 AND expires_at IS NOT NULL",
+                    (str(guild_id), str(user_id), action)
+                )
+        for user_id in user_ids:
+            self.bot.db.append("""
+                INSERT INTO moderation (guild_id, user_id, mod_id, action, reason, duration, timestamp, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (str(guild_id), str(user_id), str(mod_id), action, reason, duration, timestamp, expires_at))
+        if expires_at:
+            for user_id in user_ids:
+                self.scheduler.schedule(str(guild_id), str(user_id), action, expires_at)
+
+        # Log des sanctions : une vague de bans devient quelques messages groupés
+        config = await self.bot.config.get("security", str(guild_id))
+        if config.logs_admin:
+            extra = f" ({duration})" if duration else ""
+            for user_id in user_ids:
+                self.bot.logs.send(
+                    config.logs_admin,
+                    f"{SANCTION_ICONS.get(action, '🛡️')} `{action}{extra}` <@{user_id}> — par <@{mod_id}> : `{reason}`"
+                )
+
+    async def close_sanction(self, guild_id, user_id, action: str):
+        """Levée manuelle : annule l'échéance et marque les lignes inactives."""
+        self.scheduler.cancel(str(guild_id), str(user_id), action)
+        await self.bot.db.execute(
+            "UPDATE moderation SET active = 0 WHERE guild_id = ? AND user_id = ? AND +action = ? AND +active = 1",
+            (str(guild_id), str(user_id), action)
+        )
+
+    async def lift_ban(self, guild_id: str, user_id: str) -> bool:
+        guild = self.bot.get_guild(int(guild_id))
+        if guild is None:
+            # Avant on_ready le cache des serveurs est vide : on réessaiera.
+            # Une fois prêt, un serveur absent = bot retiré, rien à lever
+            return self.bot.is_ready()
+        try:
+            await guild.unban(discord.Object(id=int(user_id)), reason="Fin du ban temporaire")
+        except discord.NotFound:
+            pass  # Déjà débanni
+        except discord.HTTPException:
+            return False
+        return True
+
+    async def apply_mute(self, member: discord.Member, mod, reason: str, duration: str = None) -> int:
+        """Timeout natif Discord (aucune permission de salon à réécrire).
+        Retourne la durée appliquée en secondes."""
+        seconds = mute_seconds(duration)
+        if seconds is None:
+            raise ValueError(f"Durée invalide : {duration}")
+        await member.timeout(timedelta(seconds=seconds), reason=reason)
+        await self.record_mutes(member.guild.id, [member.id], mod.id, reason, duration, seconds)
+        return seconds
+
+    async def record_mutes(self, guild_id, user_ids, mod_id, reason: str, duration: str, seconds: int):
+        await self.record_sanctions(guild_id, user_ids, mod_id, "mute", reason, duration or "28d", seconds)
+        guild_mutes = self.mutes.setdefault(str(guild_id), {})
+        expires_at = int(now()) + seconds
+        for user_id in user_ids:
+            guild_mutes[str(user_id)] = (expires_at, str(mod_id), reason)
+
+    def forget_mute(self, guild_id, user_id):
+        guild_mutes = self.mutes.get(str(guild_id))
+        if guild_mutes is not None:
+            guild_mutes.pop(str(user_id), None)
+
+    async def lift_mute(self, guild_id: str, user_id: str) -> bool:
+        # Discord lève le timeout lui-même : il suffit de mettre l'index à jour
+        self.forget_mute(guild_id, user_id)
+        return True
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self._legacy_checked:
+            self._legacy_checked = True
+            await self.adopt_legacy_rows()
+
+    async def adopt_legacy_rows(self):
+        """Sanctions enregistrées avant la colonne guild_id (migration 4).
+
+        Sans serveur, elles n'apparaissent ni dans /banlist ni dans /warnlist :
+        si le bot n'est que sur un serveur, elles lui sont rattachées.
+        """
+        row = await self.bot.db.fetchone("SELECT COUNT(*) FROM moderation WHERE guild_id IS NULL")
+        if not row[0]:
+            return
+        if len(self.bot.guilds) != 1:
+            print(f"⚠️ {row[0]} sanctions sans serveur (antérieures à guild_id) : "
+                  f"non rattachées, le bot est sur {len(self.bot.guilds)} serveurs")
+            return
+        guild_id = str(self.bot.guilds[0].id)
+        count = await self.bot.db.execute("UPDATE moderation SET guild_id = ? WHERE guild_id IS NULL", (guild_id,))
+        print(f"🗄️ {count} anciennes sanctions rattachées au serveur {guild_id}")
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # Timeout retiré à la main depuis Discord → synchroniser la base et l'index
+        if before.timed_out_until and not after.timed_out_until:
+            if str(after.id) in self.mutes.get(str(after.guild.id), {}):
+                self.forget_mute(after.guild.id, after.id)
+                await self.close_sanction(after.guild.id, after.id, "mute")
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild: discord.Guild, user):
+        self.bans.add(guild.id, user)
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user):
+        self.bans.remove(guild.id, user.id)
 
     @discord.app_commands.command()
     @discord.app_commands.checks.has_permissions(ban_members=True)
     async def ban(self, interaction: discord.Interaction, user: discord.User, time: str = None, *, reason: str = "Aucune raison"):
+        duration = parse_time(time) if time else None
+        if time and duration is None:
+            await interaction.response.send_message("`❌ Format durée invalide. Ex: 30m, 2h, 1d.`", ephemeral=True)
+            return
         await interaction.response.defer(ephemeral=False)
         mod = interaction.user
-        duration = parse_time(time) if time else None
-
-        # Enregistrer dans la DB
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO moderation (user_id, mod_id, action, reason, duration, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (str(user.id), str(mod.id), "ban", reason, time or "permanent", int(time.time())))
-            await db.commit()
 
         # Ban réel (permanent ou temporaire)
         try:
             await interaction.guild.ban(user, reason=reason)
-            msg = f"\`✅ {user} a été banni\`"
-            if duration:
-                msg += f" pour `{time}`."
-                # (Optionnel) Planifier le unban avec asyncio ou un task manager
-            await interaction.followup.send(msg)
-        except:
+        except discord.HTTPException:
             await interaction.followup.send("\`❌ Impossible de bannir cet utilisateur.\`")
+            return
+
+        # Enregistrer dans la DB (et planifier le déban si temporaire) une fois le ban effectif
+        await self.record_sanction(interaction.guild.id, user.id, mod.id, "ban", reason, time or "permanent", duration)
+        msg = f"\`✅ {user} a été banni\`"
+        if duration:
+            msg += f" pour `{time}`."
+        await interaction.followup.send(msg)
 
     @discord.app_commands.command()
     @discord.app_commands.checks.has_permissions(ban_members=True)
     async def unban(self, interaction: discord.Interaction, user: str):
-        # user = "Nom#1234" ou ID
+        # user = "Nom#1234" ou ID (l'autocomplétion renvoie l'ID)
         await interaction.response.defer()
+        guild = interaction.guild
         try:
-            ban_entries = [b async for b in interaction.guild.bans()]
-            target = None
             if user.isdigit():
-                target = discord.Object(id=int(user))
-            else:
-                for ban in ban_entries:
-                    if str(ban.user) == user:
-                        target = ban.user
-                        break
-            if target:
-                await interaction.guild.unban(target)
-                await interaction.followup.send(f"\`🔓 {user} a été débanni.\`")
+                # Un ID suffit : aucun parcours de la liste des bans
+                user_id = int(user)
             else:
-                await interaction.followup.send("\`❌ Utilisateur non trouvé dans la liste des bans.\`")
+                await self.bans.ensure(guild)
+                user_id = self.bans.find(guild.id, user)
+            if user_id is None:
+                await interaction.followup.send("`❌ Utilisateur non trouvé dans la liste des bans.`")
+                return
+            await guild.unban(discord.Object(id=user_id))
+            self.bans.remove(guild.id, user_id)
+            await self.close_sanction(guild.id, user_id, "ban")
+            await interaction.followup.send(f"\`🔓 {user} a été débanni.\`")
+        except discord.NotFound:
+            await interaction.followup.send("`❌ Utilisateur non trouvé dans la liste des bans.`")
         except:
             await interaction.followup.send("\`❌ Échec du déban.\`")
 
+    @unban.autocomplete("user")
+    async def unban_autocomplete(self, interaction: discord.Interaction, current: str):
+        guild = interaction.guild
+        # Pas de chargement bloquant ici : Discord n'attend que 3 s la réponse
+        self.bans.preload(guild)
+        return [
+            discord.app_commands.Choice(name=f"{name} ({user_id})"[:100], value=str(user_id))
+            for name, user_id in self.bans.search(guild.id, current)
+        ]
+
     @discord.app_commands.command()
     async def banlist(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute("SELECT user_id, mod_id, reason, duration FROM moderation WHERE action = 'ban' AND active = 1")
-            bans = await cursor.fetchall()
-        if not bans:
-            await interaction.followup.send("\`📭 Aucun ban actif.\`")
-            return
-        lines = ["\`🔒 Liste des bans :\`"]
-        for user_id, mod_id, reason, duration in bans:
-            lines.append(f"• <@{user_id}> — par <@{mod_id}> | `{duration}` | `{reason}`")
-        await interaction.followup.send("\n".join(lines[:10]))  # limiter à 10
+        view = HistoryView(self.bot.db, str(interaction.guild.id), "🔒 Liste des bans", "`📭 Aucun ban actif.`",
+                           format_ban, action="ban")
+        await view.load()
+        await interaction.followup.send(view.render(), view=view)
 
     # --- Mute / Unmute / Mutelist ---
-    # Même logique : stocker dans DB, appliquer rôle "Muted", etc.
-    # (Pour gagner de la place, je résume ici — tu peux demander le code complet)
+    # Timeout natif : pas de rôle "Muted" ni de permissions à poser sur chaque salon
 
     @discord.app_commands.command()
-    @discord.app_commands.checks.has_permissions(mute_members=True)
+    @discord.app_commands.checks.has_permissions(moderate_members=True)
     async def mute(self, interaction: discord.Interaction, user: discord.Member, time: str = None, *, reason: str = "Aucune raison"):
-        # → Créer rôle "Muted" si absent, appliquer, log en DB
-        pass
+        if mute_seconds(time) is None:
+            await interaction.response.send_message("`❌ Format durée invalide. Ex: 30m, 2h, 1d.`", ephemeral=True)
+            return
+        try:
+            seconds = await self.apply_mute(user, interaction.user, reason, time)
+        except discord.HTTPException:
+            await interaction.response.send_message("`❌ Impossible de muter cet utilisateur.`", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"`🔇 {user} est muet jusqu'au` <t:{int(now()) + seconds}:f> `: {reason}`"
+        )
 
     @discord.app_commands.command()
-    @discord.app_commands.checks.has_permissions(mute_members=True)
+    @discord.app_commands.checks.has_permissions(moderate_members=True)
     async def unmute(self, interaction: discord.Interaction, user: discord.Member):
-        # → Retirer rôle "Muted"
-        pass
+        try:
+            await user.timeout(None, reason=f"Unmute par {interaction.user}")
+        except discord.HTTPException:
+            await interaction.response.send_message("`❌ Impossible de démuter cet utilisateur.`", ephemeral=True)
+            return
+        self.forget_mute(interaction.guild.id, user.id)
+        await self.close_sanction(interaction.guild.id, user.id, "mute")
+        await interaction.response.send_message(f"`🔊 {user} n'est plus muet.`")
 
     @discord.app_commands.command()
     async def mutelist(self, interaction: discord.Interaction):
-        # → Lire DB, afficher
-        pass
+        current = int(now())
+        mutes = sorted(
+            (expires_at, user_id, mod_id, reason)
+            for user_id, (expires_at, mod_id, reason) in self.mutes.get(str(interaction.guild.id), {}).items()
+            if expires_at > current
+        )
+        if not mutes:
+            await interaction.response.send_message("`📭 Aucun mute actif.`")
+            return
+        lines = ["`🔇 Mutes actifs :`"]
+        lines.extend(
+            f"• <@{user_id}> — par <@{mod_id}> | fin <t:{expires_at}:R> | `{reason}`"
+            for expires_at, user_id, mod_id, reason in mutes[:MUTELIST_LIMIT]
+        )
+        if len(mutes) > MUTELIST_LIMIT:
+            lines.append(f"`… et {len(mutes) - MUTELIST_LIMIT} autres`")
+        await interaction.response.send_message("\n".join(lines))
+
+    # --- Sanctions de masse (raids) ---
+
+    def select_targets(self, guild: discord.Guild, mod: discord.Member, ids: str = None,
+                       joined: str = None, pattern: str = None) -> list:
+        """IDs explicites + membres correspondant à tous les filtres donnés
+        (arrivés depuis `joined`, pseudo qui matche `pattern`)."""
+        targets = {}
+        for user_id in re.findall(r"\d{15,20}", ids or ""):
+            targets[int(user_id)] = guild.get_member(int(user_id)) or discord.Object(id=int(user_id))
+
+        if joined or pattern:
+            since = discord.utils.utcnow() - timedelta(seconds=parse_time(joined) or 0) if joined else None
+            regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+            for member in guild.members:
+                if since and (member.joined_at is None or member.joined_at < since):
+                    continue
+                if regex and not (regex.search(member.name) or regex.search(member.display_name)):
+                    continue
+                targets[member.id] = member
+
+        # Jamais le modérateur, le propriétaire, un bot ni un rôle égal ou supérieur
+        selected = []
+        for user_id, target in targets.items():
+            if user_id in (mod.id, guild.owner_id):
+                continue
+            if isinstance(target, discord.Member) and (target.bot or target.top_role >= mod.top_role):
+                continue
+            selected.append(target)
+        return selected
+
+    async def run_bulk(self, targets: list, call, progress=None) -> list:
+        """Applique `call(target)` avec au plus BULK_CONCURRENCY appels en vol.
+        Retourne les IDs traités avec succès."""
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+        done = []
+
+        async def worker(target):
+            async with semaphore:
+                try:
+                    await call(target)
+                except discord.HTTPException:
+                    return
+                done.append(target.id)
+                if progress:
+                    progress(len(done))
+
+        await asyncio.gather(*(worker(target) for target in targets))
+        return done
+
+    async def bulk_ban(self, guild: discord.Guild, targets: list, reason: str, progress=None) -> list:
+        def ban_each(rest: list, offset: int = 0):
+            report = (lambda count: progress(offset + count)) if progress else None
+            return self.run_bulk(rest, lambda t: guild.ban(t, reason=reason), report)
+
+        # L'appel groupé exige aussi "Gérer le serveur" : sinon, un ban par membre
+        if not hasattr(guild, "bulk_ban") or not guild.me.guild_permissions.manage_guild:
+            return await ban_each(targets)
+        done = []
+        for start in range(0, len(targets), BULK_BAN_CHUNK):
+            try:
+                result = await guild.bulk_ban(targets[start:start + BULK_BAN_CHUNK], reason=reason)
+            except discord.Forbidden:
+                # Appel groupé refusé : le reste part en bans individuels
+                return done + await ban_each(targets[start:], len(done))
+            except discord.HTTPException:
+                continue
+            done.extend(user.id for user in result.banned)
+            if progress:
+                progress(len(done))
+        return done
+
+    @discord.app_commands.command(name="sanction_masse", description="Bannir ou muter plusieurs comptes (raid)")
+    @discord.app_commands.describe(
+        ids="IDs séparés par des espaces ou virgules",
+        arrivee="Membres arrivés depuis (ex: 10m, 1h)",
+        pseudo="Expression régulière sur le pseudo",
+        time="Durée (ex: 30m, 2h, 1d)"
+    )
+    @discord.app_commands.choices(action=[
+        discord.app_commands.Choice(name="ban", value="ban"),
+        discord.app_commands.Choice(name="mute", value="mute"),
+    ])
+    @discord.app_commands.checks.has_permissions(ban_members=True, moderate_members=True)
+    async def sanction_masse(self, interaction: discord.Interaction, action: str, ids: str = None,
+                             arrivee: str = None, pseudo: str = None, time: str = None,
+                             reason: str = "Raid"):
+        if not (ids or arrivee or pseudo):
+            await interaction.response.send_message("`❌ Indiquez des IDs, une fenêtre d'arrivée ou un pseudo.`", ephemeral=True)
+            return
+        if (time and parse_time(time) is None) or (arrivee and parse_time(arrivee) is None):
+            await interaction.response.send_message("`❌ Format durée invalide. Ex: 30m, 2h, 1d.`", ephemeral=True)
+            return
+        try:
+            targets = self.select_targets(interaction.guild, interaction.user, ids, arrivee, pseudo)
+        except re.error:
+            await interaction.response.send_message("`❌ Expression régulière invalide.`", ephemeral=True)
+            return
+        if not targets:
+            await interaction.response.send_message("`📭 Aucun membre ne correspond.`", ephemeral=True)
+            return
+        if len(targets) > BULK_MAX:
+            await interaction.response.send_message(
+                f"`❌ {len(targets)} comptes ciblés (max {BULK_MAX}). Affinez les filtres.`", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+        guild = interaction.guild
+        total = len(targets)
+        message = await interaction.followup.send(f"`⏳ {action} : 0/{total}`", wait=True)
+
+        # Progression : un edit au plus toutes les PROGRESS_INTERVAL secondes
+        state = {"count": 0, "shown": 0}
+
+        def progress(count):
+            state["count"] = count
+
+        async def report():
+            while True:
+                await asyncio.sleep(PROGRESS_INTERVAL)
+                if state["count"] != state["shown"]:
+                    state["shown"] = state["count"]
+                    try:
+                        await message.edit(content=f"`⏳ {action} : {state['count']}/{total}`")
+                    except discord.HTTPException:
+                        pass
+
+        reporter = asyncio.create_task(report())
+        try:
+            if action == "ban":
+                seconds = parse_time(time) if time else None
+                done = await self.bulk_ban(guild, targets, reason, progress)
+                if done:
+                    await self.record_sanctions(guild.id, done, interaction.user.id, "ban", reason,
+                                                time or "permanent", seconds)
+            else:
+                seconds = mute_seconds(time)
+                members = [t for t in targets if isinstance(t, discord.Member)]
+                until = timedelta(seconds=seconds)
+                done = await self.run_bulk(members, lambda m: m.timeout(until, reason=reason), progress)
+                if done:
+                    await self.record_mutes(guild.id, done, interaction.user.id, reason, time, seconds)
+        finally:
+            reporter.cancel()
+
+        failed = total - len(done)
+        summary = f"`✅ {action} : {len(done)}/{total} comptes traités`"
+        if failed:
+            summary += f" `({failed} échecs)`"
+        await message.edit(content=summary)
 
     # --- Warn ---
     @discord.app_commands.command()
     @discord.app_commands.checks.has_permissions(kick_members=True)
     async def warn(self, interaction: discord.Interaction, user: discord.User, *, reason: str):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO moderation (user_id, mod_id, action, reason, timestamp)
-                VALUES (?, ?, 'warn', ?, ?)
-            """, (str(user.id), str(interaction.user.id), reason, int(time.time())))
-            await db.commit()
+        await self.record_sanction(interaction.guild.id, user.id, interaction.user.id, "warn", reason)
         await interaction.response.send_message(f"\`⚠️ {user} a reçu un avertissement : {reason}\`")
 
     @discord.app_commands.command()
@@ -125,16 +619,18 @@ class Moderation(commands.Cog):
 
     @discord.app_commands.command()
     async def warnlist(self, interaction: discord.Interaction):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute("SELECT user_id, mod_id, reason FROM moderation WHERE action = 'warn' AND active = 1")
-            warns = await cursor.fetchall()
-        if not warns:
-            await interaction.response.send_message("\`📭 Aucun avertissement.\`")
-            return
-        lines = ["\`📢 Avertissements :\`"]
-        for user_id, mod_id, reason in warns:
-            lines.append(f"• <@{user_id}> — par <@{mod_id}> : `{reason}`")
-        await interaction.response.send_message("\n".join(lines))
+        view = HistoryView(self.bot.db, str(interaction.guild.id), "📢 Avertissements", "`📭 Aucun avertissement.`",
+                           format_warn, action="warn")
+        await view.load()
+        await interaction.response.send_message(view.render(), view=view)
+
+    @discord.app_commands.command(name="historique", description="Historique des sanctions d'un membre")
+    @discord.app_commands.checks.has_permissions(kick_members=True)
+    async def historique(self, interaction: discord.Interaction, user: discord.User):
+        view = HistoryView(self.bot.db, str(interaction.guild.id), f"📜 Sanctions de {user}", "`📭 Aucune sanction.`",
+                           format_history, user_id=str(user.id))
+        await view.load()
+        await interaction.response.send_message(view.render(), view=view)
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
@@ -1,9 +1,8 @@
 # cogs/moderation_ui.py
 import discord
 from discord.ext import commands
-import aiosqlite
-import time
 import re
+from cogs.moderation import parse_time
 
 class ModoModal(discord.ui.Modal, title="🛡️ Sanctionner un membre"):
     def __init__(self, target: discord.Member):
@@ -46,15 +45,12 @@ class ModoModal(discord.ui.Modal, title="🛡️ Sanctionner un membre"):
             await interaction.response.send_message("`❌ Action invalide. Utilisez : ban, mute, ou warn.`", ephemeral=True)
             return
 
+        moderation = interaction.client.get_cog("Moderation")
+
         # Pour 'warn', pas de durée
         if action == "warn":
             # Log en DB
-            async with aiosqlite.connect("royal_bot.db") as db:
-                await db.execute("""
-                    INSERT INTO moderation (user_id, mod_id, action, reason, timestamp)
-                    VALUES (?, ?, 'warn', ?, ?)
-                """, (str(self.target.id), str(interaction.user.id), reason, int(time.time())))
-                await db.commit()
+            await moderation.record_sanction(interaction.guild.id, self.target.id, interaction.user.id, "warn", reason)
 
             await interaction.response.send_message(f"`⚠️ {self.target} a reçu un avertissement : {reason}`", ephemeral=True)
             return
@@ -66,7 +62,8 @@ class ModoModal(discord.ui.Modal, title="🛡️ Sanctionner un membre"):
 
         # Valider le format de la durée
         match = re.fullmatch(r'(\d+)([smhd])', duration_str.lower())
-        if not match:
+        seconds = parse_time(duration_str) if match else None
+        if seconds is None:  # "0m" passe la regex mais ne donne aucune durée
             await interaction.response.send_message("`❌ Format durée invalide. Ex: 30m, 2h, 1d.`", ephemeral=True)
             return
 
@@ -78,17 +75,17 @@ class ModoModal(discord.ui.Modal, title="🛡️ Sanctionner un membre"):
             except Exception as e:
                 await interaction.response.send_message(f"`❌ Échec du ban : {e}`", ephemeral=True)
                 return
+            # Log en DB + déban automatique à l'échéance
+            await moderation.record_sanction(
+                interaction.guild.id, self.target.id, interaction.user.id, action, reason, duration_str, seconds
+            )
         elif action == "mute":
+            try:
+                await moderation.apply_mute(self.target, interaction.user, reason, duration_str)
+            except discord.HTTPException as e:
+                await interaction.response.send_message(f"`❌ Échec du mute : {e}`", ephemeral=True)
+                return
             msg = f"`🔇 {self.target} muté ({duration_str}) : {reason}`"
-            # (À compléter avec rôle "Muted" si implémenté)
-
-        # Log en DB
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO moderation (user_id, mod_id, action, reason, duration, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (str(self.target.id), str(interaction.user.id), action, reason, duration_str, int(time.time())))
-            await db.commit()
 
         await interaction.response.send_message(msg, ephemeral=True)
 
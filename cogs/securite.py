@@ -1,57 +1,309 @@
 # cogs/securite.py (extrait anti-lien)
 
+import asyncio
 import discord
 from discord.ext import commands
-import aiosqlite
-import re
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+import time
+from utils.message_store import MessageStore
+from utils.scanner import ScanRules, get_scanner
 
-def contains_forbidden_content(message: discord.Message) -> bool:
-    """Détecte tout contenu non autorisé (liens, médias, etc.)."""
-    # 1. Texte avec liens
-    if re.search(r'https?://|www\.|discord\.(gg|com/invite)', message.content, re.IGNORECASE):
-        return True
-    # 2. Embeds (liens cachés)
-    if message.embeds:
-        return True
-    # 3. Fichiers non autorisés
-    for att in message.attachments:
-        if not att.filename.lower().endswith(('.txt', '.png', '.jpg', '.jpeg')):
-            return True
-    # 4. GIF/vidéos dans le texte
-    if re.search(r'\.(gif|mp4|webm|mov|avi|mkv|exe|bat|dll)', message.content, re.IGNORECASE):
+# Types de règles modifiables par /anti_lien_regle → champ de ScanRules
+RULE_FIELDS = {
+    "domaine_autorise": "allowed_domains",
+    "invitation": "invite_domains",
+    "extension_bloquee": "blocked_extensions",
+    "piece_jointe_autorisee": "allowed_attachments",
+    "schema": "schemes",
+}
+
+@lru_cache(maxsize=256)
+def scanner_for(link_rules):
+    # JSON de la config → scanner compilé, une seule fois par jeu de règles
+    return get_scanner(ScanRules.from_json(link_rules))
+
+def contains_forbidden_content(message: discord.Message, link_rules=None):
+    """Détecte tout contenu non autorisé (liens, médias, etc.) : (règle, extrait) ou None."""
+    return scanner_for(link_rules).scan(
+        message.content,
+        len(message.embeds),
+        [att.filename for att in message.attachments]
+    )
+
+# ========== ANTI-SPAM ==========
+SPAM_RATE = 6            # messages max...
+SPAM_WINDOW = 5.0        # ...sur cette fenêtre (secondes)
+SPAM_DUPLICATES = 3      # même message répété dans la fenêtre
+SPAM_MENTIONS = 5        # mentions dans un seul message
+SPAM_MAX_USERS = 20000   # au-delà, les membres inactifs sont oubliés (LRU)
+
+class SpamState:
+    __slots__ = ("stamps", "last_hash", "last_time", "repeats", "alerted_at")
+
+    def __init__(self, rate: int):
+        self.stamps = deque(maxlen=rate)
+        self.last_hash = None
+        self.last_time = 0.0
+        self.repeats = 0
+        self.alerted_at = 0.0
+
+class SpamTracker:
+    """Fenêtre glissante par (serveur, membre) : coût constant par message."""
+
+    def __init__(self, rate=SPAM_RATE, window=SPAM_WINDOW, duplicates=SPAM_DUPLICATES,
+                 mentions=SPAM_MENTIONS, max_users=SPAM_MAX_USERS):
+        self.rate = rate
+        self.window = window
+        self.duplicates = duplicates
+        self.mentions = mentions
+        self.max_users = max_users
+        self._users = OrderedDict()
+
+    def _state(self, key) -> SpamState:
+        state = self._users.get(key)
+        if state is None:
+            state = self._users[key] = SpamState(self.rate)
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(key)
+        return state
+
+    def check(self, guild_id: int, user_id: int, content: str, mentions: int, now: float = None):
+        """Retourne "rate", "duplicate", "mentions" ou None."""
+        now = time.monotonic() if now is None else now
+        state = self._state((guild_id, user_id))
+
+        # Débit : la deque ne garde que les SPAM_RATE derniers horodatages
+        stamps = state.stamps
+        stamps.append(now)
+        if len(stamps) == stamps.maxlen and now - stamps[0] < self.window:
+            return "rate"
+
+        # Doublons : seul le hash du dernier message est gardé
+        digest = hash(content.strip().lower()) if content else None
+        if digest is not None and digest == state.last_hash and now - state.last_time < self.window:
+            state.repeats += 1
+        else:
+            state.repeats = 1
+        state.last_hash = digest
+        state.last_time = now
+        if digest is not None and state.repeats >= self.duplicates:
+            return "duplicate"
+
+        if mentions >= self.mentions:
+            return "mentions"
+        return None
+
+    def should_alert(self, guild_id: int, user_id: int, now: float = None) -> bool:
+        # Une seule alerte par membre et par fenêtre, même si tous ses messages sont supprimés
+        now = time.monotonic() if now is None else now
+        state = self._state((guild_id, user_id))
+        if now - state.alerted_at < self.window:
+            return False
+        state.alerted_at = now
         return True
-    return False
+
+    def __len__(self):
+        return len(self._users)
+
+# Longueur max d'un contenu recopié dans un log
+LOG_EXCERPT = 900
+
+def excerpt(content: str) -> str:
+    content = content or "[Vide]"
+    return content if len(content) <= LOG_EXCERPT else content[:LOG_EXCERPT] + "…"
+
+# ========== LOGS VOCAUX ==========
+# Les mouvements vocaux partent en récapitulatif toutes les N secondes
+VOICE_DIGEST_INTERVAL = 30.0
+
+def format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}" if hours else f"{minutes}min{secs:02d}"
+
+# ========== SUPPRESSIONS GROUPÉES ==========
+PURGE_WINDOW = 1.0             # détections regroupées par salon pendant N secondes
+BULK_DELETE_MAX = 100          # limite de l'endpoint de suppression en masse
+# L'endpoint refuse les messages de plus de 14 jours (marge d'une minute)
+BULK_DELETE_AGE = timedelta(days=14, minutes=-1)
+
+class DeleteQueue:
+    """Messages à supprimer, regroupés par salon.
+
+    Une vague de 50 messages devient un seul appel delete_messages au lieu
+    de 50 DELETE successifs ; les messages trop anciens pour l'endpoint en
+    masse sont supprimés un par un.
+    """
+
+    def __init__(self, window: float = PURGE_WINDOW):
+        self.window = window
+        self._pending = {}   # salon → {id: message}
+        self._channels = {}
+        self._tasks = {}
+
+        # Statistiques
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.deleted = 0
+
+    def add(self, message):
+        channel_id = message.channel.id
+        self._pending.setdefault(channel_id, {})[message.id] = message
+        self._channels[channel_id] = message.channel
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = asyncio.create_task(self._run(channel_id))
+
+    async def _run(self, channel_id: int):
+        try:
+            while self._pending.get(channel_id):
+                await asyncio.sleep(self.window)
+                await self._flush(channel_id)
+        finally:
+            self._tasks.pop(channel_id, None)
+
+    async def _flush(self, channel_id: int):
+        messages = list(self._pending.pop(channel_id, {}).values())
+        channel = self._channels.pop(channel_id, None)
+        if not messages or channel is None:
+            return
+        limit = discord.utils.utcnow() - BULK_DELETE_AGE
+        recent = [m for m in messages if m.created_at > limit]
+        old = [m for m in messages if m.created_at <= limit]
+
+        for start in range(0, len(recent), BULK_DELETE_MAX):
+            chunk = recent[start:start + BULK_DELETE_MAX]
+            try:
+                # Un seul message : discord.py utilise la suppression simple
+                await channel.delete_messages(chunk, reason="Anti-spam / anti-liens")
+            except discord.NotFound:
+                # Au moins un message déjà supprimé : l'appel groupé échoue en entier
+                old.extend(chunk)
+                continue
+            except discord.HTTPException:
+                continue
+            if len(chunk) > 1:
+                self.bulk_calls += 1
+            else:
+                self.single_calls += 1
+            self.deleted += len(chunk)
+
+        for message in old:
+            try:
+                await message.delete()
+            except discord.HTTPException:
+                continue
+            self.single_calls += 1
+            self.deleted += 1
+
+    async def close(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for channel_id in list(self._pending):
+            await self._flush(channel_id)
+
+SPAM_LABELS = {
+    "rate": "Trop de messages",
+    "duplicate": "Messages répétés",
+    "mentions": "Mentions de masse",
+}
 
 class SecurityCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.spam = SpamTracker()
+        self.messages = MessageStore()
+        self.deletions = DeleteQueue()
+        # Sessions vocales en cours : (serveur, membre) → (salon, arrivée)
+        self.voice_sessions = {}
+
+    async def cog_load(self):
+        # Au démarrage les serveurs ne sont pas encore en cache : on_ready s'en charge
+        if self.bot.is_ready():
+            self.seed_voice()
+
+    async def cog_unload(self):
+        await self.deletions.close()
+        # Sessions encore ouvertes : enregistrées jusqu'à maintenant
+        at = time.time()
+        for (guild_id, user_id), (channel_id, joined_at) in self.voice_sessions.items():
+            self.record_voice_session(guild_id, user_id, channel_id, joined_at, at)
+        self.voice_sessions.clear()
+
+    def seed_voice(self):
+        at = time.time()
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels + guild.stage_channels:
+                for member in channel.members:
+                    if not member.bot:
+                        self.voice_sessions.setdefault((guild.id, member.id), (channel.id, at))
+
+    def record_voice_session(self, guild_id, user_id, channel_id, joined_at: float, left_at: float):
+        # Écriture différée : les sessions partent en lot avec le prochain flush
+        self.bot.db.append(
+            "INSERT INTO voice_sessions (guild_id, user_id, channel_id, joined_at, left_at) VALUES (?, ?, ?, ?, ?)",
+            (str(guild_id), str(user_id), str(channel_id), int(joined_at), int(left_at))
+        )
 
     async def get_config(self, guild_id: str):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute("""
-                SELECT anti_links_global, anti_links_salon, logs_links
-                FROM security_config WHERE guild_id = ?
-            """, (guild_id,))
-            row = await cursor.fetchone()
-            if row:
-                return {
-                    "anti_links_global": bool(row[0]),
-                    "anti_links_salon": row[1],
-                    "logs_links": row[2]
-                }
-            return {"anti_links_global": False, "anti_links_salon": None, "logs_links": None}
-
-    async def log_link(self, guild, channel_id, author, content, salon):
-        if channel_id:
-            channel = guild.get_channel(int(channel_id))
-            if channel:
-                await channel.send(
-                    f"{author.mention}\n\n"
-                    f"🔗 LIEN BLOQUÉ\n"
-                    f"Contenu non autorisé :\n\n"
-                    f"`{content or '[Embed/Pièce jointe]'}`\n\n"
-                    f"📅 {datetime.now().strftime('%d/%m %H:%M:%S')} • {salon.mention}"
-                )
+        # Servi par le cache mémoire : aucune requête SQL par message
+        return await self.bot.config.get("security", guild_id)
+
+    # Les logs passent par bot.logs : regroupés par salon, jamais un envoi par événement
+    def log_link(self, channel_id, author, content, salon):
+        self.bot.logs.send(
+            channel_id,
+            f"{author.mention}\n"
+            f"🔗 LIEN BLOQUÉ\n"
+            f"Contenu non autorisé : `{excerpt(content) if content else '[Embed/Pièce jointe]'}`\n"
+            f"📅 {datetime.now().strftime('%d/%m %H:%M:%S')} • {salon.mention}"
+        )
+
+    def log_spam(self, channel_id, author, reason, salon):
+        self.bot.logs.send(
+            channel_id,
+            f"{author.mention}\n"
+            f"🚫 SPAM DÉTECTÉ\n"
+            f"Motif : `{SPAM_LABELS[reason]}`\n"
+            f"📅 {datetime.now().strftime('%d/%m %H:%M:%S')} • {salon.mention}"
+        )
+
+    def log_message_delete(self, channel_id, record, salon_id):
+        files = f"\nPièces jointes : `{', '.join(record.attachments)}`" if record.attachments else ""
+        self.bot.logs.send(
+            channel_id,
+            f"<@{record.author_id}>\n"
+            f"🗑️ MESSAGE SUPPRIMÉ\n"
+            f"`{excerpt(record.content)}`{files}\n"
+            f"📅 {datetime.now().strftime('%d/%m %H:%M:%S')} • <#{salon_id}>"
+        )
+
+    def log_message_edit(self, guild_id, channel_id, record, before, salon_id):
+        link = f"https://discord.com/channels/{guild_id}/{salon_id}/{record.id}"
+        self.bot.logs.send(
+            channel_id,
+            f"<@{record.author_id}>\n"
+            f"✏️ MESSAGE MODIFIÉ\n"
+            f"Avant : `{excerpt(before)}`\n"
+            f"Après : `{excerpt(record.content)}`\n"
+            f"📅 {datetime.now().strftime('%d/%m %H:%M:%S')} • {link}"
+        )
+
+    def log_bulk_delete(self, channel_id, records, total, salon_id):
+        lines = [f"🧹 SUPPRESSION DE MASSE : {total} messages"]
+        size = len(lines[0])
+        for shown, record in enumerate(records):
+            line = f"<@{record.author_id}> : `{excerpt(record.content)[:200]}`"
+            if size + len(line) > 1700:
+                lines.append(f"… et {len(records) - shown} autres")
+                break
+            lines.append(line)
+            size += len(line) + 1
+        lines.append(f"📅 {datetime.now().strftime('%d/%m %H:%M:%S')} • <#{salon_id}>")
+        self.bot.logs.send(channel_id, "\n".join(lines))
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -59,63 +311,227 @@ class SecurityCog(commands.Cog):
             return
 
         config = await self.get_config(str(message.guild.id))
+
+        if config.anti_spam:
+            mentions = len(message.raw_mentions) + len(message.raw_role_mentions) + (10 if message.mention_everyone else 0)
+            reason = self.spam.check(message.guild.id, message.author.id, message.content, mentions)
+            if reason:
+                self.deletions.add(message)
+                if self.spam.should_alert(message.guild.id, message.author.id):
+                    self.log_spam(config.logs_spam, message.author, reason, message.channel)
+                    if config.spam_purge_minutes:
+                        self.purge_recent(message.author, config.spam_purge_minutes)
+                return
+
         should_block = False
 
         # Global
-        if config["anti_links_global"]:
+        if config.anti_links_global:
             should_block = True
         # Par salon
-        elif config["anti_links_salon"] and str(message.channel.id) == config["anti_links_salon"]:
+        elif config.anti_links_salon and str(message.channel.id) == config.anti_links_salon:
             should_block = True
 
-        if should_block and contains_forbidden_content(message):
-            await message.delete()
-            await self.log_link(
-                message.guild,
-                config["logs_links"],
+        if should_block and contains_forbidden_content(message, config.link_rules):
+            self.deletions.add(message)
+            self.log_link(
+                config.logs_links,
                 message.author,
                 message.content,
                 message.channel
             )
+            return
+
+        # Contenu gardé en mémoire pour les logs de suppression/modification
+        if config.logs_messages:
+            self.messages.add(message, (config.message_cache_kb or 0) * 1024)
+
+    def purge_recent(self, member: discord.Member, minutes: int):
+        """Supprime les messages du membre des N dernières minutes, tous salons
+        confondus, à partir du cache de discord.py (aucun appel d'historique)."""
+        since = discord.utils.utcnow() - timedelta(minutes=minutes)
+        for cached in reversed(self.bot.cached_messages):
+            if cached.created_at < since:
+                break
+            if cached.author.id == member.id and cached.guild == member.guild:
+                self.deletions.add(cached)
+
+    # --- LOGS DE MESSAGES (événements bruts : aucun fetch REST) ---
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.guild_id is None:
+            return
+        record = self.messages.pop(payload.channel_id, payload.message_id)
+        if record is None:
+            return  # Message inconnu : bot, supprimé par les filtres ou trop ancien
+        config = await self.get_config(str(payload.guild_id))
+        if config.logs_messages:
+            self.log_message_delete(config.logs_messages, record, payload.channel_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        if payload.guild_id is None:
+            return
+        records = self.messages.pop_many(payload.channel_id, payload.message_ids)
+        if not records:
+            return  # Contenu inconnu (ex. purge anti-spam) : rien à journaliser
+        config = await self.get_config(str(payload.guild_id))
+        if config.logs_messages:
+            self.log_bulk_delete(config.logs_messages, records, len(payload.message_ids), payload.channel_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        content = payload.data.get("content")
+        if payload.guild_id is None or content is None:
+            return  # Mise à jour d'embed uniquement
+        before = self.messages.edit(payload.channel_id, payload.message_id, content)
+        if before is None or before == content:
+            return
+        config = await self.get_config(str(payload.guild_id))
+        if config.logs_messages:
+            record = self.messages.get(payload.channel_id, payload.message_id)
+            if record is not None:
+                self.log_message_edit(payload.guild_id, config.logs_messages, record, before, payload.channel_id)
+
+    # --- LOGS VOCAUX ---
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.seed_voice()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if member.bot or before.channel == after.channel:
+            return  # Mute/sourdine : pas un changement de salon
+        at = time.time()
+        key = (member.guild.id, member.id)
+        session = self.voice_sessions.pop(key, None)
+        if session is not None:
+            channel_id, joined_at = session
+            self.record_voice_session(member.guild.id, member.id, channel_id, joined_at, at)
+        if after.channel is not None:
+            self.voice_sessions[key] = (after.channel.id, at)
+
+        config = await self.get_config(str(member.guild.id))
+        if not config.logs_vocal:
+            return
+        stamp = datetime.now().strftime('%H:%M:%S')
+        duration = f" ({format_duration(at - session[1])})" if session else ""
+        if before.channel is None:
+            line = f"`{stamp}` 🔊 {member.mention} a rejoint {after.channel.mention}"
+        elif after.channel is None:
+            line = f"`{stamp}` 🔈 {member.mention} a quitté {before.channel.mention}{duration}"
+        else:
+            line = f"`{stamp}` 🔀 {member.mention} {before.channel.mention} → {after.channel.mention}{duration}"
+        self.bot.logs.send(config.logs_vocal, line, window=VOICE_DIGEST_INTERVAL)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.messages.drop_channel(channel.id)
 
     # --- COMMANDES ---
     @discord.app_commands.command(name="anti_lien", description="Activer/désactiver l'anti-liens sur tout le serveur")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def anti_lien(self, interaction: discord.Interaction, activer: bool):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute(
-                "INSERT INTO security_config (guild_id, anti_links_global) VALUES (?, ?) "
-                "ON CONFLICT(guild_id) DO UPDATE SET anti_links_global = excluded.anti_links_global",
-                (str(interaction.guild.id), int(activer))
-            )
-            await db.commit()
+        await self.bot.config.set("security", str(interaction.guild.id), anti_links_global=activer)
         await interaction.response.send_message(f"`✅ Anti-liens global = {activer}`", ephemeral=False)
 
     @discord.app_commands.command(name="anti_lien_salon", description="Activer/désactiver l'anti-liens dans un salon spécifique")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def anti_lien_salon(self, interaction: discord.Interaction, salon: discord.TextChannel, activer: bool):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            if activer:
-                value = str(salon.id)
-            else:
-                value = None
-            await db.execute(
-                "INSERT INTO security_config (guild_id, anti_links_salon) VALUES (?, ?) "
-                "ON CONFLICT(guild_id) DO UPDATE SET anti_links_salon = excluded.anti_links_salon",
-                (str(interaction.guild.id), value)
-            )
-            await db.commit()
+        if activer:
+            value = str(salon.id)
+        else:
+            value = None
+        await self.bot.config.set("security", str(interaction.guild.id), anti_links_salon=value)
         status = "activé" if activer else "désactivé"
         await interaction.response.send_message(f"`✅ Anti-liens {status} dans {salon.mention}`", ephemeral=False)
 
     @discord.app_commands.command(name="logs_liens", description="Définir le salon des logs de liens")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def logs_liens(self, interaction: discord.Interaction, salon: discord.TextChannel):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute(
-                "INSERT INTO security_config (guild_id, logs_links) VALUES (?, ?) "
-                "ON CONFLICT(guild_id) DO UPDATE SET logs_links = excluded.logs_links",
-                (str(interaction.guild.id), str(salon.id))
-            )
-            await db.commit()
-        await interaction.response.send_message(f"`✅ Logs liens → {salon.mention}`", ephemeral=False)
\ No newline at end of file
+        await self.bot.config.set("security", str(interaction.guild.id), logs_links=str(salon.id))
+        await interaction.response.send_message(f"`✅ Logs liens → {salon.mention}`", ephemeral=False)
+
+    @discord.app_commands.command(name="anti_spam", description="Activer/désactiver l'anti-spam sur tout le serveur")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    @discord.app_commands.describe(purge_minutes="Supprimer aussi les messages du spammeur des N dernières minutes (0 = non)")
+    async def anti_spam(self, interaction: discord.Interaction, activer: bool,
+                        purge_minutes: discord.app_commands.Range[int, 0, 60] = None):
+        values = {"anti_spam": activer}
+        if purge_minutes is not None:
+            values["spam_purge_minutes"] = purge_minutes or None
+        config = await self.bot.config.set("security", str(interaction.guild.id), **values)
+        purge = f" (purge {config.spam_purge_minutes} min)" if config.spam_purge_minutes else ""
+        await interaction.response.send_message(f"`✅ Anti-spam = {activer}{purge}`", ephemeral=False)
+
+    @discord.app_commands.command(name="logs_spam", description="Définir le salon des logs de spam")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def logs_spam(self, interaction: discord.Interaction, salon: discord.TextChannel):
+        await self.bot.config.set("security", str(interaction.guild.id), logs_spam=str(salon.id))
+        await interaction.response.send_message(f"`✅ Logs spam → {salon.mention}`", ephemeral=False)
+
+    @discord.app_commands.command(name="logs_messages", description="Définir le salon des logs de messages (suppression/modification)")
+    @discord.app_commands.describe(cache_ko="Mémoire gardée par salon, en Ko (défaut du bot si vide)")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def logs_messages(self, interaction: discord.Interaction, salon: discord.TextChannel = None,
+                            cache_ko: discord.app_commands.Range[int, 16, 4096] = None):
+        guild_id = str(interaction.guild.id)
+        await self.bot.config.set(
+            "security", guild_id,
+            logs_messages=str(salon.id) if salon else None,
+            message_cache_kb=cache_ko
+        )
+        if salon:
+            await interaction.response.send_message(f"`✅ Logs messages →` {salon.mention}", ephemeral=False)
+        else:
+            await interaction.response.send_message("`✅ Logs messages désactivés`", ephemeral=False)
+
+    @discord.app_commands.command(name="logs_vocal", description="Définir le salon des logs vocaux (récapitulatif périodique)")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def logs_vocal(self, interaction: discord.Interaction, salon: discord.TextChannel = None):
+        await self.bot.config.set("security", str(interaction.guild.id), logs_vocal=str(salon.id) if salon else None)
+        if salon:
+            await interaction.response.send_message(f"`✅ Logs vocaux →` {salon.mention}", ephemeral=False)
+        else:
+            await interaction.response.send_message("`✅ Logs vocaux désactivés`", ephemeral=False)
+
+    @discord.app_commands.command(name="logs_admin", description="Définir le salon des logs de sanctions")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def logs_admin(self, interaction: discord.Interaction, salon: discord.TextChannel = None):
+        await self.bot.config.set("security", str(interaction.guild.id), logs_admin=str(salon.id) if salon else None)
+        if salon:
+            await interaction.response.send_message(f"`✅ Logs sanctions →` {salon.mention}", ephemeral=False)
+        else:
+            await interaction.response.send_message("`✅ Logs sanctions désactivés`", ephemeral=False)
+
+    @discord.app_commands.command(name="logs_messages_stats", description="Mémoire utilisée par le cache des logs de messages")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def logs_messages_stats(self, interaction: discord.Interaction):
+        stats = self.messages.stats()
+        await interaction.response.send_message(
+            f"`📦 Cache messages : {stats['messages']} messages / {stats['channels']} salons`\n"
+            f"`💾 {stats['bytes'] / 1024:.0f} Ko / {stats['max_bytes'] / 1048576:.0f} Mo` "
+            f"`• succès {stats['hit_rate']:.0%} • évictions {stats['evicted']}`",
+            ephemeral=True
+        )
+
+    @discord.app_commands.command(name="anti_lien_regle", description="Ajouter/retirer une règle de l'anti-liens")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    @discord.app_commands.choices(type=[
+        discord.app_commands.Choice(name="Domaine autorisé", value="domaine_autorise"),
+        discord.app_commands.Choice(name="Domaine d'invitation", value="invitation"),
+        discord.app_commands.Choice(name="Extension bloquée", value="extension_bloquee"),
+        discord.app_commands.Choice(name="Pièce jointe autorisée", value="piece_jointe_autorisee"),
+        discord.app_commands.Choice(name="Schéma de lien", value="schema"),
+    ])
+    async def anti_lien_regle(self, interaction: discord.Interaction, type: str, valeur: str, activer: bool):
+        guild_id = str(interaction.guild.id)
+        config = await self.get_config(guild_id)
+        valeur = valeur.strip().lower().lstrip(".")
+        rules = ScanRules.from_json(config.link_rules).toggle(RULE_FIELDS[type], valeur, activer)
+        await self.bot.config.set("security", guild_id, link_rules=rules.to_json())
+        status = "ajoutée" if activer else "retirée"
+        await interaction.response.send_message(f"`✅ Règle {status} : {type} = {valeur}`", ephemeral=False)
+
+async def setup(bot):
+    await bot.add_cog(SecurityCog(bot))
@@ -0,0 +1,215 @@
+# cogs/stats.py
+import asyncio
+import discord
+from discord.ext import commands
+from collections import Counter
+import os
+import time
+
+# Intervalle de flush des compteurs (secondes, aligné sur l'horloge)
+STATS_FLUSH = float(os.getenv("STATS_FLUSH", "60"))
+STATS_TOP = 5
+
+# Tables de cumul : (table, taille d'un bucket en secondes, rétention en secondes ou None)
+ROLLUPS = (
+    ("stats_minute", 60, 2 * 86400),
+    ("stats_hour", 3600, 90 * 86400),
+    ("stats_day", 86400, None),
+)
+PURGE_INTERVAL = 3600
+
+# Période affichée → (table interrogée, durée en secondes)
+PERIODS = {
+    "heure": ("stats_minute", 3600),
+    "jour": ("stats_hour", 86400),
+    "semaine": ("stats_day", 7 * 86400),
+    "mois": ("stats_day", 30 * 86400),
+}
+
+def format_duration(seconds: int) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours} h {minutes:02d} min" if hours else f"{minutes} min"
+
+class ActivityCounters:
+    """Compteurs depuis le dernier flush, clés (serveur, salon, membre).
+
+    Un message = un incrément de dict ; le vocal est crédité au départ du
+    salon et à chaque flush pour les sessions encore ouvertes.
+    """
+
+    def __init__(self):
+        self.messages = Counter()
+        self.voice = Counter()
+        self.sessions = {}   # (serveur, membre) → (salon, début)
+
+    def message(self, guild_id: int, channel_id: int, user_id: int):
+        self.messages[(guild_id, channel_id, user_id)] += 1
+
+    def voice_join(self, guild_id: int, user_id: int, channel_id: int, at: float):
+        self.sessions[(guild_id, user_id)] = (channel_id, at)
+
+    def voice_leave(self, guild_id: int, user_id: int, at: float):
+        session = self.sessions.pop((guild_id, user_id), None)
+        if session is not None:
+            channel_id, start = session
+            self.voice[(guild_id, channel_id, user_id)] += at - start
+
+    def drain(self, at: float):
+        """Retourne (messages, vocal) accumulés et repart de zéro."""
+        for (guild_id, user_id), (channel_id, start) in self.sessions.items():
+            self.voice[(guild_id, channel_id, user_id)] += at - start
+            self.sessions[(guild_id, user_id)] = (channel_id, at)
+        messages, voice = self.messages, self.voice
+        self.messages, self.voice = Counter(), Counter()
+        return messages, voice
+
+    def restore(self, messages: Counter, voice: Counter):
+        # Flush raté : les compteurs repartent avec le prochain
+        self.messages.update(messages)
+        self.voice.update(voice)
+
+class Stats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.counters = ActivityCounters()
+        self._window_start = time.time()
+        self._last_purge = 0.0
+        self._task = None
+
+    async def cog_load(self):
+        # Au démarrage les serveurs ne sont pas encore en cache : on_ready s'en charge
+        if self.bot.is_ready():
+            self.seed_voice()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+
+    def seed_voice(self):
+        # Membres déjà en vocal au démarrage
+        at = time.time()
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels + guild.stage_channels:
+                for user_id in channel.voice_states:
+                    # Comme on_voice_state_update : les bots ne sont pas comptés
+                    member = guild.get_member(user_id)
+                    if member is not None and member.bot:
+                        continue
+                    if (guild.id, user_id) not in self.counters.sessions:
+                        self.counters.voice_join(guild.id, user_id, channel.id, at)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(STATS_FLUSH - time.time() % STATS_FLUSH)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Flush des statistiques : {e}")
+
+    async def flush(self):
+        at = time.time()
+        start, self._window_start = self._window_start, at
+        messages, voice = self.counters.drain(at)
+        purge = at - self._last_purge >= PURGE_INTERVAL
+        if not messages and not voice and not purge:
+            return
+
+        rows = []
+        for key in messages.keys() | voice.keys():
+            guild_id, channel_id, user_id = key
+            rows.append((str(guild_id), str(channel_id), str(user_id), messages.get(key, 0), round(voice.get(key, 0))))
+
+        async def job(conn):
+            for table, size, retention in ROLLUPS:
+                bucket = int(start // size * size)
+                await conn.executemany(
+                    f"INSERT INTO {table} (guild_id, bucket, channel_id, user_id, messages, voice_seconds) "
+                    f"VALUES (?, {bucket}, ?, ?, ?, ?) "
+                    f"ON CONFLICT (guild_id, bucket, channel_id, user_id) DO UPDATE SET "
+                    f"messages = messages + excluded.messages, voice_seconds = voice_seconds + excluded.voice_seconds",
+                    rows
+                )
+                if purge and retention:
+                    await conn.execute(f"DELETE FROM {table} WHERE bucket < ?", (int(at - retention),))
+
+        try:
+            await self.bot.db.transaction(job)
+        except Exception:
+            self.counters.restore(messages, voice)
+            raise
+        if purge:
+            self._last_purge = at
+
+    # ========== COLLECTE ==========
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.seed_voice()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot:
+            return
+        self.counters.message(message.guild.id, message.channel.id, message.author.id)
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if member.bot or before.channel == after.channel:
+            return
+        at = time.time()
+        if before.channel is not None:
+            self.counters.voice_leave(member.guild.id, member.id, at)
+        if after.channel is not None:
+            self.counters.voice_join(member.guild.id, member.id, after.channel.id, at)
+
+    # ========== COMMANDES ==========
+    @discord.app_commands.command(name="stats", description="Activité du serveur ou d'un membre")
+    @discord.app_commands.choices(periode=[
+        discord.app_commands.Choice(name=name, value=name) for name in PERIODS
+    ])
+    async def stats(self, interaction: discord.Interaction, membre: discord.Member = None, periode: str = "semaine"):
+        table, span = PERIODS[periode]
+        guild_id = str(interaction.guild.id)
+        since = int(time.time() - span)
+        where = "guild_id = ? AND bucket >= ?"
+        params = [guild_id, since]
+        if membre:
+            where += " AND user_id = ?"
+            params.append(str(membre.id))
+
+        total = await self.bot.db.fetchone(
+            f"SELECT SUM(messages), SUM(voice_seconds) FROM {table} WHERE {where}", params
+        )
+        channels = await self.bot.db.fetchall(
+            f"SELECT channel_id, SUM(messages) AS m FROM {table} WHERE {where} "
+            f"GROUP BY channel_id HAVING m > 0 ORDER BY m DESC LIMIT {STATS_TOP}", params
+        )
+        messages, voice = (total[0] or 0, total[1] or 0) if total else (0, 0)
+
+        title = f"📊 Activité de {membre.display_name}" if membre else f"📊 Activité de {interaction.guild.name}"
+        embed = discord.Embed(title=f"{title} ({periode})", color=0x5865F2)
+        embed.add_field(name="Messages", value=f"`{messages}`")
+        embed.add_field(name="Vocal", value=f"`{format_duration(voice)}`")
+        if channels:
+            embed.add_field(
+                name="Salons les plus actifs",
+                value="\n".join(f"<#{channel_id}> — `{count}`" for channel_id, count in channels),
+                inline=False
+            )
+        if not membre:
+            members = await self.bot.db.fetchall(
+                f"SELECT user_id, SUM(messages) AS m FROM {table} WHERE {where} "
+                f"GROUP BY user_id HAVING m > 0 ORDER BY m DESC LIMIT {STATS_TOP}", params
+            )
+            if members:
+                embed.add_field(
+                    name="Membres les plus actifs",
+                    value="\n".join(f"<@{user_id}> — `{count}`" for user_id, count in members),
+                    inline=False
+                )
+        embed.set_footer(text=f"Mis à jour toutes les {int(STATS_FLUSH)} s")
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Stats(bot))
@@ -1,9 +1,9 @@
 # cogs/ticket.py
 import discord
 from discord.ext import commands
-import aiosqlite
 from datetime import datetime
 import re
+from utils.db import next_ticket_number
 
 # ========== BOUTON CLOSE (PERSISTANT) ==========
 class CloseTicketButton(discord.ui.View):
@@ -48,25 +48,7 @@ class TicketCategorySelect(discord.ui.Select):
         member = interaction.user
 
         # --- Compteur global ---
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute(
-                "SELECT ticket_counter FROM ticket_config WHERE guild_id = ?",
-                (guild_id,)
-            )
-            row = await cursor.fetchone()
-            if row:
-                ticket_number = row[0]
-                await db.execute(
-                    "UPDATE ticket_config SET ticket_counter = ? WHERE guild_id = ?",
-                    (ticket_number + 1, guild_id)
-                )
-            else:
-                ticket_number = 1
-                await db.execute(
-                    "INSERT INTO ticket_config (guild_id, ticket_counter) VALUES (?, ?)",
-                    (guild_id, 2)
-                )
-            await db.commit()
+        ticket_number = await next_ticket_number(interaction.client.db, guild_id)
 
         # --- Nom du salon ---
         safe_cat = re.sub(r'[^\w\s-]', '', category_name).replace(' ', '-').lower()
@@ -125,24 +107,18 @@ class TicketCog(commands.Cog):
     @discord.app_commands.command(name="ticket", description="Créer un menu de ticket dans ce salon")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def ticket_menu(self, interaction: discord.Interaction):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute(
-                "SELECT name FROM ticket_categories WHERE guild_id = ?",
-                (str(interaction.guild.id),)
-            )
-            categories = [row[0] async for row in cursor]
+        rows = await self.bot.db.fetchall(
+            "SELECT name FROM ticket_categories WHERE guild_id = ?",
+            (str(interaction.guild.id),)
+        )
+        categories = [row[0] for row in rows]
 
         if not categories:
             await interaction.response.send_message("❌ Aucune catégorie. Utilisez `/ticket add-categorie <nom>`.", ephemeral=False)
             return
 
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute(
-                "SELECT ping_role_id FROM ticket_config WHERE guild_id = ?",
-                (str(interaction.guild.id),)
-            )
-            row = await cursor.fetchone()
-            ping_role_id = row[0] if row else None
+        config = await self.bot.config.get("ticket", str(interaction.guild.id))
+        ping_role_id = config.ping_role_id
 
         view = TicketMenuView(categories, str(interaction.guild.id), ping_role_id)
         content = (
@@ -158,46 +134,34 @@ class TicketCog(commands.Cog):
     @discord.app_commands.command(name="ticket_add_categorie", description="Ajouter une catégorie")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def ticket_add_categorie(self, interaction: discord.Interaction, nom: str):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute(
-                "INSERT INTO ticket_categories (guild_id, name) VALUES (?, ?)",
-                (str(interaction.guild.id), nom)
-            )
-            await db.commit()
+        await self.bot.db.execute(
+            "INSERT INTO ticket_categories (guild_id, name) VALUES (?, ?)",
+            (str(interaction.guild.id), nom)
+        )
         await interaction.response.send_message(f"✅ Catégorie ajoutée : `{nom}`", ephemeral=False)
 
     @discord.app_commands.command(name="ticket_del_categorie", description="Supprimer une catégorie")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def ticket_del_categorie(self, interaction: discord.Interaction, nom: str):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute(
-                "DELETE FROM ticket_categories WHERE guild_id = ? AND name = ?",
-                (str(interaction.guild.id), nom)
-            )
-            await db.commit()
+        await self.bot.db.execute(
+            "DELETE FROM ticket_categories WHERE guild_id = ? AND name = ?",
+            (str(interaction.guild.id), nom)
+        )
         await interaction.response.send_message(f"✅ Catégorie supprimée : `{nom}`", ephemeral=False)
 
     @discord.app_commands.command(name="ticket_edit_categorie", description="Renommer une catégorie")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def ticket_edit_categorie(self, interaction: discord.Interaction, ancien: str, nouveau: str):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute(
-                "UPDATE ticket_categories SET name = ? WHERE guild_id = ? AND name = ?",
-                (nouveau, str(interaction.guild.id), ancien)
-            )
-            await db.commit()
+        await self.bot.db.execute(
+            "UPDATE ticket_categories SET name = ? WHERE guild_id = ? AND name = ?",
+            (nouveau, str(interaction.guild.id), ancien)
+        )
         await interaction.response.send_message(f"✅ Catégorie renommée : `{ancien}` → `{nouveau}`", ephemeral=False)
 
     @discord.app_commands.command(name="ticket_ping", description="Définir le rôle à ping")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def ticket_ping(self, interaction: discord.Interaction, role: discord.Role):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO ticket_config (guild_id, ping_role_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET ping_role_id = excluded.ping_role_id
-            """, (str(interaction.guild.id), str(role.id)))
-            await db.commit()
+        await self.bot.config.set("ticket", str(interaction.guild.id), ping_role_id=str(role.id))
         await interaction.response.send_message(f"✅ Rôle de ping défini : {role.mention}", ephemeral=False)
 
 async def setup(bot):
@@ -1,13 +1,51 @@
 # cogs/welcome.py
 import discord
 from discord.ext import commands
-import aiosqlite
+import asyncio
 import io
+import multiprocessing
 import os
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+from utils.avatars import AvatarFetcher
 
 # Chemin du fond personnalisé (1024x500, format JPG)
 BG_PATH = "assets/welcome_bg.jpg"
+FONT_PATH = "assets/arial.ttf"
+AVATAR_SIZE = 200
+RENDER_CACHE_SIZE = 64
+
+# Rendu hors de la boucle asyncio : "process" (défaut) ou "thread"
+RENDER_MODE = os.getenv("WELCOME_RENDER_MODE", "process")
+RENDER_WORKERS = int(os.getenv("WELCOME_RENDER_WORKERS", "2"))
+# Au-delà de ce nombre de rendus en attente → message texte de secours
+RENDER_QUEUE_LIMIT = int(os.getenv("WELCOME_RENDER_QUEUE", "16"))
+# Workers lancés sans "fork" : le bot a déjà des threads (aiosqlite, to_thread)
+# et un fork à ce moment peut bloquer le processus enfant
+RENDER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Encodages possibles de l'image finale : nom → (extension, options Pillow)
+ENCODINGS = {
+    "png": ("png", {"format": "PNG"}),
+    "png-rapide": ("png", {"format": "PNG", "compress_level": 1}),
+    "png-optimise": ("png", {"format": "PNG", "optimize": True}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 85}),
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+}
+# "auto" : format le plus rapide sous WELCOME_MAX_KB, mesuré au chargement du cog
+WELCOME_FORMAT = os.getenv("WELCOME_FORMAT", "auto")
+WELCOME_MAX_BYTES = int(os.getenv("WELCOME_MAX_KB", "250")) * 1024
+
+# Mode groupé (/welcome_batch) : arrivées regroupées sur une courte fenêtre
+JOIN_WINDOW = float(os.getenv("WELCOME_JOIN_WINDOW", "3"))
+# Au-delà de ce nombre d'arrivées dans la fenêtre → simple message texte
+JOIN_TEXT_THRESHOLD = int(os.getenv("WELCOME_TEXT_THRESHOLD", "12"))
+COLLAGE_COLUMNS = 6
+COLLAGE_AVATAR_SIZE = 130
+# Délai minimal entre deux attributions de rôle (secondes)
+ROLE_INTERVAL = float(os.getenv("WELCOME_ROLE_INTERVAL", "0.3"))
 
 class WelcomeConfigModal(discord.ui.Modal, title="🛠️ Configurer le salon de bienvenue"):
     def __init__(self, guild_id: str):
@@ -31,111 +69,421 @@ class WelcomeConfigModal(discord.ui.Modal, title="🛠️ Configurer le salon de
             await interaction.response.send_message("`❌ Salon introuvable. Vérifiez l'ID.`", ephemeral=True)
             return
 
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO welcome_config (guild_id, channel_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id
-            """, (self.guild_id, channel_id))
-            await db.commit()
+        await interaction.client.config.set("welcome", self.guild_id, channel_id=channel_id)
 
         await interaction.response.send_message(f"`✅ Salon de bienvenue défini : {channel.mention}`", ephemeral=True)
 
-def generate_welcome_image(member_name: str, avatar_bytes: bytes) -> io.BytesIO:
-    """Génère une image de bienvenue avec fond 1024x500 et texte 'NOM. A REJOINT RoyalRP'."""
-    if not os.path.exists(BG_PATH):
-        raise FileNotFoundError("Fichier assets/welcome_bg.jpg manquant")
-
-    # Charger le fond (JPG → RGB)
-    bg = Image.open(BG_PATH).convert("RGB")
-
-    # Charger et transformer l'avatar en cercle
-    avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
-    avatar = avatar.resize((200, 200), Image.LANCZOS)
-
-    mask = Image.new("L", (200, 200), 0)
-    draw_mask = ImageDraw.Draw(mask)
-    draw_mask.ellipse((0, 0, 200, 200), fill=255)
-    avatar.putalpha(mask)
-
-    # Positionner l'avatar au centre
-    x_avatar = (bg.width - 200) // 2
-    y_avatar = 150
-    bg_with_avatar = bg.convert("RGBA")
-    bg_with_avatar.paste(avatar, (x_avatar, y_avatar), avatar)
-
-    # Ajouter le texte personnalisé — TRÈS GRAND
-    draw = ImageDraw.Draw(bg_with_avatar)
-    text = f"{member_name.upper()}. A REJOINT RoyalRP"
-
-    try:
-        font = ImageFont.truetype("assets/arial.ttf", 84)
-    except:
-        font = ImageFont.load_default()
-
-    # Centrer le texte
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    x_text = (bg.width - text_width) // 2
-    y_text = 430
-
-    # Contour noir épais + texte or
-    draw.text((x_text - 6, y_text - 6), text, fill="black", font=font)
-    draw.text((x_text + 6, y_text + 6), text, fill="black", font=font)
-    draw.text((x_text, y_text), text, fill="gold", font=font)
-
-    # Finaliser et exporter
-    final_image = bg_with_avatar.convert("RGB")
-    buffer = io.BytesIO()
-    final_image.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer
+class WelcomeRenderer:
+    """Fond, police et masque chargés une seule fois, réutilisés à chaque arrivée."""
+
+    def __init__(self, bg_path: str = BG_PATH, font_path: str = FONT_PATH):
+        if not os.path.exists(bg_path):
+            raise FileNotFoundError("Fichier assets/welcome_bg.jpg manquant")
+
+        # Fond décodé et converti en RGBA une fois pour toutes
+        with Image.open(bg_path) as bg:
+            self.background = bg.convert("RGB").convert("RGBA")
+
+        try:
+            self.font = ImageFont.truetype(font_path, 84)
+            self.small_font = ImageFont.truetype(font_path, 56)
+        except OSError:
+            self.font = self.small_font = ImageFont.load_default()
+
+        self.mask = self._circle(AVATAR_SIZE)
+        self.collage_mask = self._circle(COLLAGE_AVATAR_SIZE)
+
+    @staticmethod
+    def _circle(size: int) -> Image.Image:
+        mask = Image.new("L", (size, size), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+        return mask
+
+    def _avatar(self, avatar_bytes: bytes, size: int, mask: Image.Image) -> Image.Image:
+        with Image.open(io.BytesIO(avatar_bytes)) as raw:
+            avatar = raw.convert("RGBA").resize((size, size), Image.LANCZOS)
+        avatar.putalpha(mask)
+        return avatar
+
+    @staticmethod
+    def _title(image: Image.Image, text: str, font, y_text: int, outline: int):
+        draw = ImageDraw.Draw(image)
+
+        # Centrer le texte
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        x_text = (image.width - text_width) // 2
+
+        # Contour noir épais + texte or
+        draw.text((x_text - outline, y_text - outline), text, fill="black", font=font)
+        draw.text((x_text + outline, y_text + outline), text, fill="black", font=font)
+        draw.text((x_text, y_text), text, fill="gold", font=font)
+
+    @staticmethod
+    def _export(image: Image.Image, encoding: str = "png") -> bytes:
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, **ENCODINGS[encoding][1])
+        return buffer.getvalue()
+
+    def render(self, member_name: str, avatar_bytes: bytes, encoding: str = "png") -> bytes:
+        image = self.background.copy()
+
+        # Avatar en cercle, centré
+        avatar = self._avatar(avatar_bytes, AVATAR_SIZE, self.mask)
+        x_avatar = (image.width - AVATAR_SIZE) // 2
+        y_avatar = 150
+        image.paste(avatar, (x_avatar, y_avatar), avatar)
+
+        # Ajouter le texte personnalisé — TRÈS GRAND
+        self._title(image, f"{member_name.upper()}. A REJOINT RoyalRP", self.font, 430, 6)
+        return self._export(image, encoding)
+
+    def render_collage(self, avatars: list, encoding: str = "png") -> bytes:
+        """Une seule image pour un groupe d'arrivées : grille d'avatars + compteur."""
+        image = self.background.copy()
+        size, gap = COLLAGE_AVATAR_SIZE, 20
+        count = len(avatars)
+        rows = (count + COLLAGE_COLUMNS - 1) // COLLAGE_COLUMNS
+        y_start = max(20, (400 - rows * size - (rows - 1) * gap) // 2)
+
+        for index, avatar_bytes in enumerate(avatars):
+            row, col = divmod(index, COLLAGE_COLUMNS)
+            in_row = min(COLLAGE_COLUMNS, count - row * COLLAGE_COLUMNS)
+            x_start = (image.width - in_row * size - (in_row - 1) * gap) // 2
+            avatar = self._avatar(avatar_bytes, size, self.collage_mask)
+            image.paste(avatar, (x_start + col * (size + gap), y_start + row * (size + gap)), avatar)
+
+        self._title(image, f"{count} NOUVEAUX MEMBRES SUR RoyalRP", self.small_font, 410, 4)
+        return self._export(image, encoding)
+
+    def benchmark_encodings(self, rounds: int = 3) -> dict:
+        """Temps d'encodage moyen (ms) et taille (octets) de chaque format."""
+        avatar = io.BytesIO()
+        Image.radial_gradient("L").resize((256, 256)).convert("RGB").save(avatar, format="PNG")
+        image = self.background.copy()
+        sample = self._avatar(avatar.getvalue(), AVATAR_SIZE, self.mask)
+        image.paste(sample, ((image.width - AVATAR_SIZE) // 2, 150), sample)
+        self._title(image, "MEMBRE. A REJOINT RoyalRP", self.font, 430, 6)
+
+        results = {}
+        for encoding in ENCODINGS:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                data = self._export(image, encoding)
+            results[encoding] = ((time.perf_counter() - start) / rounds * 1000, len(data))
+        return results
+
+def choose_encoding(results: dict, max_bytes: int = WELCOME_MAX_BYTES) -> str:
+    """Le format le plus rapide sous le budget de taille, sinon le plus léger."""
+    under_budget = [(ms, name) for name, (ms, size) in results.items() if size <= max_bytes]
+    if under_budget:
+        return min(under_budget)[1]
+    return min(results, key=lambda name: results[name][1])
+
+# Un renderer par worker, créé par l'initializer du pool
+_worker_renderer = None
+
+def _init_worker():
+    global _worker_renderer
+    _worker_renderer = WelcomeRenderer()
+
+def _render_in_worker(member_name: str, avatar_bytes: bytes, encoding: str) -> bytes:
+    return _worker_renderer.render(member_name, avatar_bytes, encoding)
+
+def _render_collage_in_worker(avatars: list, encoding: str) -> bytes:
+    return _worker_renderer.render_collage(avatars, encoding)
+
+def _benchmark_in_worker(rounds: int) -> dict:
+    return _worker_renderer.benchmark_encodings(rounds)
+
+class RenderPool:
+    """Rendu dans un pool de processus (ou de threads) avec file bornée.
+
+    Les images finales restent dans un LRU côté bot, indexé par (nom, hash
+    d'avatar) : /welcome_test ou un membre qui rejoint en boucle ne refont
+    pas le rendu. render() renvoie None quand la file est pleine.
+    """
+
+    def __init__(self, mode: str = RENDER_MODE, workers: int = RENDER_WORKERS,
+                 queue_limit: int = RENDER_QUEUE_LIMIT, cache_size: int = RENDER_CACHE_SIZE):
+        if not os.path.exists(BG_PATH):
+            raise FileNotFoundError("Fichier assets/welcome_bg.jpg manquant")
+        self.mode = "thread" if mode == "thread" else "process"
+        if self.mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=workers, initializer=_init_worker)
+        else:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                mp_context=multiprocessing.get_context(RENDER_START_METHOD)
+            )
+        self.queue_limit = queue_limit
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.encoding = WELCOME_FORMAT if WELCOME_FORMAT in ENCODINGS else "png"
+        self.benchmark = {}
+
+        # Métriques
+        self.pending = 0
+        self.rendered = 0
+        self.cache_hits = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=256)
+
+    async def render(self, member_name: str, avatar_bytes: bytes, avatar_key: str = None):
+        key = (member_name, avatar_key) if avatar_key else None
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+
+        data = await self._submit(_render_in_worker, member_name, avatar_bytes, self.encoding)
+        if data is not None and key is not None:
+            self._cache[key] = data
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    async def render_collage(self, avatars: list):
+        return await self._submit(_render_collage_in_worker, avatars, self.encoding)
+
+    @property
+    def extension(self) -> str:
+        return ENCODINGS[self.encoding][0]
+
+    async def calibrate(self, rounds: int = 3) -> dict:
+        """Mesure chaque format dans un worker ; en mode auto, adopte le meilleur."""
+        loop = asyncio.get_running_loop()
+        self.benchmark = await loop.run_in_executor(self.executor, _benchmark_in_worker, rounds)
+        if WELCOME_FORMAT not in ENCODINGS:
+            encoding = choose_encoding(self.benchmark)
+            if encoding != self.encoding:
+                # Les images en cache ont été encodées dans l'ancien format
+                self._cache.clear()
+                self.encoding = encoding
+        return self.benchmark
+
+    async def _submit(self, func, *args):
+        # Contre-pression : on ne laisse pas la file grossir pendant un raid
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            return None
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self.executor, func, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.latencies.append(time.perf_counter() - start)
+        self.rendered += 1
+        return data
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "mode": self.mode,
+            "encoding": self.encoding,
+            "pending": self.pending,
+            "queue_limit": self.queue_limit,
+            "rendered": self.rendered,
+            "cache_hits": self.cache_hits,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "avg_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0,
+        }
+
+    async def shutdown(self):
+        # Attente des workers hors de la boucle : avec wait=False, un worker
+        # encore en démarrage peut bloquer la sortie de l'interpréteur
+        await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
+
+class RoleQueue:
+    """Rôles de bienvenue attribués un par un, à rythme régulier.
+
+    Pendant un raid, les add_roles ne partent pas tous en même temps sur le
+    même bucket : un seul worker les enchaîne avec ROLE_INTERVAL d'écart.
+    """
+
+    def __init__(self, interval: float = ROLE_INTERVAL):
+        self.interval = interval
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    def put(self, member: discord.Member, role: discord.Role):
+        self.queue.put_nowait((member, role))
+
+    async def _run(self):
+        while True:
+            member, role = await self.queue.get()
+            try:
+                await member.add_roles(role, reason="Rôle de bienvenue")
+            except discord.HTTPException:
+                pass
+            await asyncio.sleep(self.interval)
 
 class WelcomeCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.renderer = None
+        self.avatars = None
+        self.roles = RoleQueue()
+        # Mode groupé : arrivées en attente par serveur
+        self.pending_joins = {}
+        # Tâches de fond (calibrage, fenêtres de regroupement) : gardées pour
+        # ne pas être ramassées par le GC et pour être vidées au déchargement
+        self._tasks = set()
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        # Récupérer la config du serveur
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute(
-                "SELECT channel_id, role_id FROM welcome_config WHERE guild_id = ?",
-                (str(member.guild.id),)
-            )
-            row = await cursor.fetchone()
+    async def cog_load(self):
+        # Assets chargés une seule fois par worker, au chargement du cog
+        try:
+            self.renderer = RenderPool()
+            # Choix du format en arrière-plan : PNG en attendant le résultat
+            self.spawn(self.renderer.calibrate())
+        except FileNotFoundError as e:
+            print(f"⚠️ {e}")
+        self.avatars = AvatarFetcher(self.bot.session)
+        self.roles.start()
 
-        if not row or not row[0]:
-            return  # Pas configuré → silence
+    async def cog_unload(self):
+        self.roles.stop()
+        # Les fenêtres de regroupement ouvertes sont écourtées : leurs arrivées
+        # partent en message texte au lieu d'être perdues
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.renderer:
+            await self.renderer.shutdown()
 
-        channel_id, role_id = row
-        channel = member.guild.get_channel(int(channel_id))
-        if not channel:
-            return
+    def spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
 
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Tâche de bienvenue : {task.exception()!r}")
+
+    async def fetch_avatar(self, user) -> bytes:
+        return await self.avatars.fetch(user)
+
+    async def send_welcome(self, channel, member: discord.Member):
         try:
             # Télécharger l'avatar
-            avatar_url = member.display_avatar.replace(size=512).url
-            async with self.bot.session.get(avatar_url) as resp:
-                avatar_data = await resp.read()
+            avatar_data = await self.fetch_avatar(member)
 
-            # Générer et envoyer l'image
-            image_buffer = generate_welcome_image(member.name, avatar_data)
-            file = discord.File(image_buffer, filename="welcome.png")
-            await channel.send(file=file)
+            # Générer et envoyer l'image (texte seul si le rendu est saturé)
+            image_buffer = await self.generate_welcome_image(member.name, avatar_data, member.display_avatar.key)
+            if image_buffer is None:
+                # Rendu saturé (raid) : messages texte regroupés par bot.logs
+                self.bot.logs.send(channel.id, f"`⚙️ Bienvenue` {member.mention} `sur RoyalRP !`")
+            else:
+                file = discord.File(image_buffer, filename=f"welcome.{self.renderer.extension}")
+                await channel.send(file=file)
 
         except Exception:
             # En cas d'erreur, message de secours
-            await channel.send(f"`⚙️ Bienvenue {member.mention} sur RoyalRP !`")
+            self.bot.logs.send(channel.id, f"`⚙️ Bienvenue` {member.mention} `sur RoyalRP !`")
+
+    async def send_text_welcome(self, channel, members: list):
+        # Message léger : mentions regroupées, découpées sous la limite Discord
+        header = f"`⚙️ Bienvenue sur RoyalRP à nos {len(members)} nouveaux membres !`\n"
+        content = header
+        for member in members:
+            mention = member.mention + " "
+            if len(content) + len(mention) > 2000:
+                await channel.send(content)
+                content = ""
+            content += mention
+        if content:
+            await channel.send(content)
+
+    async def flush_joins(self, guild_id: int, channel):
+        try:
+            await asyncio.sleep(JOIN_WINDOW)
+        except asyncio.CancelledError:
+            # Déchargement du cog pendant la fenêtre
+            members = self.pending_joins.pop(guild_id, [])
+            if members:
+                await self.send_text_welcome(channel, members)
+            raise
+        members = self.pending_joins.pop(guild_id, [])
+        if not members:
+            return
+        if len(members) == 1:
+            await self.send_welcome(channel, members[0])
+            return
+        if len(members) > JOIN_TEXT_THRESHOLD or self.renderer is None:
+            await self.send_text_welcome(channel, members)
+            return
+
+        try:
+            avatars = await asyncio.gather(*(self.fetch_avatar(m) for m in members))
+            data = await self.renderer.render_collage(list(avatars))
+        except Exception:
+            data = None
+        if data is None:
+            await self.send_text_welcome(channel, members)
+            return
+        mentions = " ".join(m.mention for m in members)
+        await channel.send(
+            content=f"`⚙️ Bienvenue sur RoyalRP !`\n{mentions}",
+            file=discord.File(io.BytesIO(data), filename=f"welcome.{self.renderer.extension}")
+        )
+
+    async def generate_welcome_image(self, member_name: str, avatar_bytes: bytes, avatar_key: str = None):
+        """Génère une image de bienvenue avec fond 1024x500 et texte 'NOM. A REJOINT RoyalRP'.
 
-        # Attribution automatique du rôle
+        Renvoie None si la file de rendu est saturée.
+        """
+        if self.renderer is None:
+            raise FileNotFoundError("Fichier assets/welcome_bg.jpg manquant")
+        data = await self.renderer.render(member_name, avatar_bytes, avatar_key)
+        return io.BytesIO(data) if data is not None else None
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        # Récupérer la config du serveur
+        config = await self.bot.config.get("welcome", str(member.guild.id))
+
+        if not config.channel_id:
+            return  # Pas configuré → silence
+
+        channel_id, role_id = config.channel_id, config.role_id
+        channel = member.guild.get_channel(int(channel_id))
+        if not channel:
+            return
+
+        # Attribution automatique du rôle, via la file cadencée
         if role_id:
             role = member.guild.get_role(int(role_id))
             if role and role < member.guild.me.top_role:
-                try:
-                    await member.add_roles(role, reason="Rôle de bienvenue")
-                except:
-                    pass
+                self.roles.put(member, role)
+
+        if config.batch_mode:
+            # La première arrivée ouvre la fenêtre, les suivantes s'y ajoutent
+            batch = self.pending_joins.setdefault(member.guild.id, [])
+            batch.append(member)
+            if len(batch) == 1:
+                self.spawn(self.flush_joins(member.guild.id, channel))
+            return
+
+        await self.send_welcome(channel, member)
 
     @discord.app_commands.command(name="welcome", description="Configurer le salon de bienvenue")
     @discord.app_commands.checks.has_permissions(administrator=True)
@@ -146,46 +494,74 @@ class WelcomeCog(commands.Cog):
     @discord.app_commands.command(name="welcome_role", description="Définir le rôle à donner à l’arrivée")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def welcome_role(self, interaction: discord.Interaction, role: discord.Role):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            await db.execute("""
-                INSERT INTO welcome_config (guild_id, role_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET role_id = excluded.role_id
-            """, (str(interaction.guild.id), str(role.id)))
-            await db.commit()
+        await self.bot.config.set("welcome", str(interaction.guild.id), role_id=str(role.id))
         await interaction.response.send_message(f"`✅ Rôle de bienvenue défini : {role.name}`", ephemeral=True)
 
+    @discord.app_commands.command(name="welcome_batch", description="Regrouper les arrivées simultanées en un seul message")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def welcome_batch(self, interaction: discord.Interaction, activer: bool):
+        await self.bot.config.set("welcome", str(interaction.guild.id), batch_mode=activer)
+        await interaction.response.send_message(f"`✅ Bienvenue groupée = {activer}`", ephemeral=True)
+
     @discord.app_commands.command(name="welcome_test", description="Tester le message de bienvenue avec votre avatar")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def welcome_test(self, interaction: discord.Interaction):
-        async with aiosqlite.connect("royal_bot.db") as db:
-            cursor = await db.execute(
-                "SELECT channel_id FROM welcome_config WHERE guild_id = ?",
-                (str(interaction.guild.id),)
-            )
-            row = await cursor.fetchone()
+        config = await self.bot.config.get("welcome", str(interaction.guild.id))
 
-        if not row or not row[0]:
+        if not config.channel_id:
             await interaction.response.send_message("`❌ Configurez d’abord le salon avec /welcome.`", ephemeral=True)
             return
 
-        channel = interaction.guild.get_channel(int(row[0]))
+        channel = interaction.guild.get_channel(int(config.channel_id))
         if not channel:
             await interaction.response.send_message("`❌ Salon de bienvenue introuvable.`", ephemeral=True)
             return
 
         try:
-            avatar_url = interaction.user.display_avatar.replace(size=512).url
-            async with self.bot.session.get(avatar_url) as resp:
-                avatar_data = await resp.read()
-            image_buffer = generate_welcome_image(interaction.user.name, avatar_data)
-            file = discord.File(image_buffer, filename="welcome_test.png")
+            avatar_data = await self.fetch_avatar(interaction.user)
+            image_buffer = await self.generate_welcome_image(interaction.user.name, avatar_data, interaction.user.display_avatar.key)
+            if image_buffer is None:
+                raise RuntimeError("File de rendu saturée")
+            file = discord.File(image_buffer, filename=f"welcome_test.{self.renderer.extension}")
             await channel.send(file=file)
             await interaction.response.send_message("`✅ Test envoyé avec succès.`", ephemeral=True)
         except Exception:
             await channel.send("`❌ Erreur : impossible de générer l’image de test.`")
             await interaction.response.send_message("`❌ Échec du test.`", ephemeral=True)
 
+    @discord.app_commands.command(name="welcome_stats", description="Statistiques du rendu des images de bienvenue")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def welcome_stats(self, interaction: discord.Interaction):
+        if self.renderer is None:
+            await interaction.response.send_message("`❌ Rendu d'image indisponible.`", ephemeral=True)
+            return
+        stats = self.renderer.stats()
+        avatars = self.avatars.stats()
+        await interaction.response.send_message(
+            f"`🖼️ Rendu ({stats['mode']}, {stats['encoding']}) : file {stats['pending']}/{stats['queue_limit']} | "
+            f"{stats['rendered']} rendus, {stats['cache_hits']} depuis le cache, "
+            f"{stats['rejected']} refusés, {stats['failed']} échecs | "
+            f"moyenne {stats['avg_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms`\n"
+            f"`👤 Avatars : {avatars['hit_rate']:.0%} en cache "
+            f"({avatars['memory_hits']} mémoire, {avatars['disk_hits']} disque, {avatars['deduped']} fusionnés, {avatars['downloads']} téléchargés) | "
+            f"{avatars['bytes_downloaded'] // 1024} Ko téléchargés, {avatars['bytes_saved'] // 1024} Ko économisés`",
+            ephemeral=True
+        )
+
+    @discord.app_commands.command(name="welcome_bench", description="Mesurer les formats d'image de bienvenue")
+    @discord.app_commands.checks.has_permissions(administrator=True)
+    async def welcome_bench(self, interaction: discord.Interaction):
+        if self.renderer is None:
+            await interaction.response.send_message("`❌ Rendu d'image indisponible.`", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        results = await self.renderer.calibrate()
+        lines = [f"`📊 Formats (budget {WELCOME_MAX_BYTES // 1024} Ko) :`"]
+        for name, (ms, size) in sorted(results.items(), key=lambda item: item[1][0]):
+            marker = "✅" if name == self.renderer.encoding else "•"
+            lines.append(f"{marker} `{name}` — {ms:.0f} ms, {size // 1024} Ko")
+        await interaction.followup.send("\n".join(lines), ephemeral=True)
+
 # Fonction de chargement du cog
 async def setup(bot):
     await bot.add_cog(WelcomeCog(bot))
\ No newline at end of file
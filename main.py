@@ -1,10 +1,16 @@
 # main.py
 import discord
 from discord.ext import commands
+import asyncio
+import hashlib
+import json
 import os
+import time
 import aiohttp
 from dotenv import load_dotenv
-from utils.db import init_db
+from utils.db import Database, init_db, get_state, set_state
+from utils.cache import ConfigCache
+from utils.logs import LogDispatcher
 
 # IMPORT DE LA CLASSE SEULEMENT (pas d'instance ici)
 from cogs.ticket import CloseTicketButton
@@ -14,32 +20,93 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 if not TOKEN:
     raise ValueError("❌ DISCORD_TOKEN manquant")
 
+# "force" : synchronise les commandes même si rien n'a changé
+SYNC_COMMANDS = os.getenv("SYNC_COMMANDS", "auto")
+
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
+def commands_hash(tree) -> str:
+    """Empreinte de ce que tree.sync() enverrait à Discord."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda c: (c["type"], c["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+class RoyalBot(commands.Bot):
+    async def setup_hook(self):
+        # Appelé une seule fois, avant la connexion à la gateway (pas à chaque reconnexion)
+        timings = []
+        start = time.perf_counter()
+
+        def phase(name):
+            nonlocal start
+            now = time.perf_counter()
+            timings.append(f"{name} {(now - start) * 1000:.0f} ms")
+            start = now
+
+        self.session = aiohttp.ClientSession()
+        # Pool SQLite unique, partagé par tous les cogs via bot.db
+        self.db = Database()
+        await self.db.connect()
+        await init_db(self.db)
+        phase("base")
+
+        # Config par serveur chargée une seule fois, servie ensuite depuis la mémoire
+        self.config = ConfigCache(self.db)
+        await self.config.load()
+        phase("config")
+
+        # Envois vers les salons de logs, regroupés (bot.logs)
+        self.logs = LogDispatcher(self)
+
+        # ✅ SEULEMENT ICI : enregistrer la vue persistante
+        self.add_view(CloseTicketButton())
+
+        extensions = [f"cogs.{name[:-3]}" for name in sorted(os.listdir("./cogs")) if name.endswith(".py")]
+        results = await asyncio.gather(*(self.load_extension(ext) for ext in extensions), return_exceptions=True)
+        for ext, result in zip(extensions, results):
+            if isinstance(result, Exception):
+                print(f"❌ Erreur chargement {ext}: {result}")
+        phase(f"{len(extensions)} extensions")
+
+        synced = await self.sync_commands()
+        phase("sync" if synced else "sync (inchangé)")
+        print(f"⏱️ Démarrage : {' | '.join(timings)}")
+
+    async def sync_commands(self) -> bool:
+        """Synchronise l'arbre de commandes seulement si son contenu a changé."""
+        key = f"commands_hash:{self.application_id}"
+        digest = commands_hash(self.tree)
+        if SYNC_COMMANDS != "force" and await get_state(self.db, key) == digest:
+            return False
+        await self.tree.sync()
+        await set_state(self.db, key, digest)
+        return True
+
+    async def close(self):
+        # Logs en attente envoyés tant que la connexion HTTP est encore ouverte
+        if self.logs is not None:
+            await self.logs.close()
+        await super().close()
+        if self.session is not None:
+            await self.session.close()
+        # Écrit les lignes encore en attente (sanctions, avis) avant de quitter
+        if self.db is not None:
+            await self.db.close()
+
+bot = RoyalBot(command_prefix="!", intents=intents, help_command=None)
 bot.session = None
+bot.db = None
+bot.config = None
+bot.logs = None
 
-# ⚠️ IL NE DOIT Y AVOIR AUCUN bot.add_view ICI ⚠️
+# ⚠️ IL NE DOIT Y AVOIR AUCUN bot.add_view ICI : voir RoyalBot.setup_hook ⚠️
 
 @bot.event
 async def on_ready():
-    bot.session = aiohttp.ClientSession()
-    await init_db()
-    
-    # ✅ SEULEMENT ICI : enregistrer la vue persistante
-    bot.add_view(CloseTicketButton())
-    
-    for filename in os.listdir("./cogs"):
-        if filename.endswith(".py"):
-            try:
-                await bot.load_extension(f"cogs.{filename[:-3]}")
-            except Exception as e:
-                print(f"❌ Erreur chargement {filename}: {e}")
-    await bot.tree.sync()
+    # Peut être appelé plusieurs fois (reconnexions) : rien à initialiser ici
     print(f"✅ Royal Bot connecté : {bot.user}")
 
 if __name__ == "__main__":
-    bot.run(TOKEN)
\ No newline at end of file
+    bot.run(TOKEN)
@@ -0,0 +1,105 @@
+# tests/test_avatars.py
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from utils.avatars import AvatarFetcher
+
+AVATAR_BYTES = 40_000   # ordre de grandeur d'un PNG 256 px
+
+class FakeCDN:
+    """Remplaçant local du CDN Discord : compte les requêtes et les octets servis."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.requests = 0
+        self.bytes_served = 0
+
+    async def handler(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        body = request.match_info["key"].encode().ljust(AVATAR_BYTES, b"\0")
+        self.bytes_served += len(body)
+        return web.Response(body=body, content_type="image/png")
+
+    def server(self) -> TestServer:
+        app = web.Application()
+        app.router.add_get("/avatars/{key}.png", self.handler)
+        return TestServer(app)
+
+async def fetch_all(fetcher: AvatarFetcher, server: TestServer, keys: list) -> list:
+    return await asyncio.gather(*(
+        fetcher.get(key, str(server.make_url(f"/avatars/{key}.png"))) for key in keys
+    ))
+
+def test_dedup_et_cache_memoire(tmp_path):
+    cdn = FakeCDN()
+
+    async def scenario():
+        async with cdn.server() as server, aiohttp.ClientSession() as session:
+            fetcher = AvatarFetcher(session, cache_dir=str(tmp_path))
+            # 10 arrivées simultanées pour chacun des 5 mêmes avatars
+            keys = [f"a{i % 5}" for i in range(50)]
+            results = await fetch_all(fetcher, server, keys)
+            # Deuxième vague : tout vient de la mémoire
+            await fetch_all(fetcher, server, keys[:5])
+            return keys, results, fetcher.stats()
+
+    keys, results, stats = asyncio.run(scenario())
+    assert all(data.startswith(key.encode()) for key, data in zip(keys, results))
+    assert cdn.requests == stats["downloads"] == 5
+    assert stats["deduped"] == 45
+    assert stats["memory_hits"] == 5
+    assert stats["hit_rate"] == pytest.approx(50 / 55)
+    assert stats["bytes_downloaded"] == cdn.bytes_served == 5 * AVATAR_BYTES
+    assert stats["bytes_saved"] == 50 * AVATAR_BYTES
+
+def test_cache_disque_apres_redemarrage(tmp_path):
+    cdn = FakeCDN(delay=0)
+
+    async def scenario():
+        async with cdn.server() as server, aiohttp.ClientSession() as session:
+            await fetch_all(AvatarFetcher(session, cache_dir=str(tmp_path)), server, ["a0", "a1", "a2"])
+            # Nouvelle instance (redémarrage du bot) : mémoire vide, disque conservé
+            fetcher = AvatarFetcher(session, cache_dir=str(tmp_path))
+            await fetch_all(fetcher, server, ["a0", "a1", "a2"])
+            return fetcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert cdn.requests == 3
+    assert stats["downloads"] == 0
+    assert stats["disk_hits"] == 3
+    assert stats["hit_rate"] == 1.0
+    assert stats["bytes_saved"] == 3 * AVATAR_BYTES
+
+def test_disque_borne(tmp_path):
+    cdn = FakeCDN(delay=0)
+
+    async def scenario():
+        async with cdn.server() as server, aiohttp.ClientSession() as session:
+            fetcher = AvatarFetcher(session, cache_dir=str(tmp_path), disk_max_bytes=3 * AVATAR_BYTES)
+            for key in ("a0", "a1", "a2", "a3", "a4"):
+                await fetch_all(fetcher, server, [key])
+            return fetcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["disk_bytes"] <= 3 * AVATAR_BYTES
+    # Les plus anciens sont évincés en premier
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a2.png", "a3.png", "a4.png"]
+
+def test_timeout_rien_en_cache(tmp_path):
+    cdn = FakeCDN(delay=1)
+
+    async def scenario():
+        async with cdn.server() as server, aiohttp.ClientSession() as session:
+            fetcher = AvatarFetcher(session, cache_dir=str(tmp_path), timeout=0.1)
+            with pytest.raises(asyncio.TimeoutError):
+                await fetch_all(fetcher, server, ["a0", "a0"])
+            return fetcher
+
+    fetcher = asyncio.run(scenario())
+    assert cdn.requests == 1
+    assert fetcher.stats()["downloads"] == 0
+    assert not fetcher._inflight and not fetcher._memory
+    assert not list(tmp_path.iterdir())
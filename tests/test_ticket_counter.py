@@ -0,0 +1,64 @@
+# tests/test_ticket_counter.py
+import asyncio
+from utils.db import Database, init_db, next_ticket_number
+
+# Sélections de catégorie simultanées (clics dans le menu de ticket)
+CONCURRENT = 300
+
+async def open_db(path) -> Database:
+    db = Database(str(path))
+    await db.connect()
+    await init_db(db)
+    return db
+
+async def allocate(db: Database, guild_id: str, count: int = CONCURRENT) -> list:
+    return await asyncio.gather(*(next_ticket_number(db, guild_id) for _ in range(count)))
+
+def test_nouveau_serveur_numeros_uniques_sans_trou(tmp_path):
+    async def scenario():
+        db = await open_db(tmp_path / "tickets.db")
+        try:
+            numbers = await allocate(db, "1")
+            counter = await db.fetchone("SELECT ticket_counter FROM ticket_config WHERE guild_id = '1'")
+        finally:
+            await db.close()
+        assert sorted(numbers) == list(range(1, CONCURRENT + 1))
+        assert counter == (CONCURRENT + 1,)
+
+    asyncio.run(scenario())
+
+def test_serveur_existant_reprend_au_compteur(tmp_path):
+    async def scenario():
+        db = await open_db(tmp_path / "tickets.db")
+        try:
+            await db.execute("INSERT INTO ticket_config (guild_id, ping_role_id, ticket_counter) VALUES ('1', '42', 57)")
+            numbers = await allocate(db, "1")
+            row = await db.fetchone("SELECT ping_role_id, ticket_counter FROM ticket_config WHERE guild_id = '1'")
+        finally:
+            await db.close()
+        assert sorted(numbers) == list(range(57, 57 + CONCURRENT))
+        # Le reste de la config du serveur n'est pas touché
+        assert row == ("42", 57 + CONCURRENT)
+
+    asyncio.run(scenario())
+
+def test_serveurs_independants_et_durables(tmp_path):
+    path = tmp_path / "tickets.db"
+
+    async def scenario():
+        db = await open_db(path)
+        try:
+            first, second = await asyncio.gather(allocate(db, "1"), allocate(db, "2", 50))
+        finally:
+            await db.close()
+        assert sorted(first) == list(range(1, CONCURRENT + 1))
+        assert sorted(second) == list(range(1, 51))
+
+        # Après redémarrage, la numérotation continue sans doublon
+        db = await open_db(path)
+        try:
+            assert await next_ticket_number(db, "1") == CONCURRENT + 1
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
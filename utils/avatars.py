@@ -0,0 +1,162 @@
+# utils/avatars.py
+import aiohttp
+import asyncio
+import os
+from collections import OrderedDict
+
+# 256 px suffit : l'avatar est réduit à 200x200 au rendu
+AVATAR_FETCH_SIZE = 256
+AVATAR_MEMORY_ITEMS = int(os.getenv("AVATAR_MEMORY_ITEMS", "256"))
+AVATAR_CACHE_DIR = os.getenv("AVATAR_CACHE_DIR", ".cache/avatars")
+AVATAR_DISK_MAX_BYTES = int(os.getenv("AVATAR_DISK_MAX_MB", "50")) * 1024 * 1024
+AVATAR_TIMEOUT = float(os.getenv("AVATAR_TIMEOUT", "5"))
+
+class AvatarFetcher:
+    """Téléchargement des avatars avec cache mémoire + disque (LRU).
+
+    La clé est le hash de l'avatar : une image en cache ne change jamais, il
+    n'y a donc rien à revalider. Les téléchargements simultanés du même
+    avatar sont fusionnés en une seule requête.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, cache_dir: str = AVATAR_CACHE_DIR,
+                 memory_items: int = AVATAR_MEMORY_ITEMS, disk_max_bytes: int = AVATAR_DISK_MAX_BYTES,
+                 timeout: float = AVATAR_TIMEOUT, size: int = AVATAR_FETCH_SIZE):
+        self.session = session
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.size = size
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+
+        # Statistiques
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.deduped = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Index disque reconstruit au démarrage, du plus ancien au plus récent
+            entries = []
+            for name in os.listdir(cache_dir):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name, stat.st_size))
+            for _, name, size in sorted(entries):
+                self._disk[name] = size
+                self._disk_bytes += size
+
+    def url_for(self, user) -> str:
+        return user.display_avatar.replace(size=self.size, format="png").url
+
+    async def fetch(self, user) -> bytes:
+        return await self.get(user.display_avatar.key, self.url_for(user))
+
+    async def get(self, key: str, url: str) -> bytes:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self.bytes_saved += len(data)
+            return data
+
+        # Même avatar déjà en cours de téléchargement → on attend le même résultat
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduped += 1
+            data = await asyncio.shield(task)
+            self.bytes_saved += len(data)
+            return data
+
+        task = asyncio.create_task(self._load(key, url))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, url: str) -> bytes:
+        data = await self._read_disk(key)
+        if data is not None:
+            self.disk_hits += 1
+            self.bytes_saved += len(data)
+        else:
+            async with self.session.get(url, timeout=self.timeout) as resp:
+                resp.raise_for_status()
+                data = await resp.read()
+            self.downloads += 1
+            self.bytes_downloaded += len(data)
+            await self._write_disk(key, data)
+
+        self._memory[key] = data
+        if len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+        return data
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    async def _read_disk(self, key: str):
+        name = f"{key}.png"
+        if not self.cache_dir or name not in self._disk:
+            return None
+        self._disk.move_to_end(name)
+        path = self._path(key)
+        try:
+            return await asyncio.to_thread(_read_and_touch, path)
+        except OSError:
+            self._disk_bytes -= self._disk.pop(name, 0)
+            return None
+
+    async def _write_disk(self, key: str, data: bytes):
+        if not self.cache_dir:
+            return
+        name = f"{key}.png"
+        try:
+            await asyncio.to_thread(_write, self._path(key), data)
+        except OSError:
+            return
+        self._disk_bytes += len(data) - self._disk.pop(name, 0)
+        self._disk[name] = len(data)
+
+        # Éviction des fichiers les moins récemment utilisés
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            old, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, old))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        saved = self.memory_hits + self.disk_hits + self.deduped
+        lookups = saved + self.downloads
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "deduped": self.deduped,
+            "downloads": self.downloads,
+            "hit_rate": saved / lookups if lookups else 0.0,
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_saved": self.bytes_saved,
+            "disk_bytes": self._disk_bytes,
+        }
+
+def _read_and_touch(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    os.utime(path)
+    return data
+
+def _write(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -0,0 +1,114 @@
+# utils/cache.py
+import os
+import time
+from dataclasses import dataclass, fields, replace
+from typing import Optional
+
+# Durée de vie des entrées (secondes). Vide = jamais rechargé, les commandes
+# admin mettent le cache à jour elles-mêmes (write-through).
+CONFIG_TTL = float(os.getenv("CONFIG_TTL", "0")) or None
+
+@dataclass(frozen=True)
+class SecurityConfig:
+    anti_links_global: bool = False
+    anti_links_salon: Optional[str] = None
+    logs_links: Optional[str] = None
+    link_rules: Optional[str] = None
+    anti_spam: bool = False
+    logs_spam: Optional[str] = None
+    spam_purge_minutes: Optional[int] = None
+    logs_messages: Optional[str] = None
+    message_cache_kb: Optional[int] = None
+    logs_vocal: Optional[str] = None
+    logs_admin: Optional[str] = None
+
+@dataclass(frozen=True)
+class WelcomeConfig:
+    channel_id: Optional[str] = None
+    role_id: Optional[str] = None
+    batch_mode: bool = False
+
+@dataclass(frozen=True)
+class AvisConfig:
+    staff_role_id: Optional[str] = None
+    avis_channel_id: Optional[str] = None
+
+@dataclass(frozen=True)
+class TicketConfig:
+    ping_role_id: Optional[str] = None
+
+# type → (table, dataclass) ; les champs portent le nom des colonnes
+CONFIG_TABLES = {
+    "security": ("security_config", SecurityConfig),
+    "welcome": ("welcome_config", WelcomeConfig),
+    "avis": ("avis_config", AvisConfig),
+    "ticket": ("ticket_config", TicketConfig),
+}
+
+class ConfigCache:
+    """Config par serveur gardée en mémoire (bot.config).
+
+    Chargée une fois au démarrage ; get() ne touche pas la base tant que
+    l'entrée est valide, set() écrit en base puis met le cache à jour.
+    """
+
+    def __init__(self, db, ttl: Optional[float] = CONFIG_TTL):
+        self.db = db
+        self.ttl = ttl
+        self._entries = {kind: {} for kind in CONFIG_TABLES}
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def _columns(cls):
+        return [f.name for f in fields(cls)]
+
+    @staticmethod
+    def _build(cls, row):
+        values = {}
+        for f, value in zip(fields(cls), row):
+            values[f.name] = bool(value) if f.type in (bool, "bool") else value
+        return cls(**values)
+
+    async def load(self):
+        for kind, (table, cls) in CONFIG_TABLES.items():
+            columns = ", ".join(self._columns(cls))
+            rows = await self.db.fetchall(f"SELECT guild_id, {columns} FROM {table}")
+            now = time.monotonic()
+            self._entries[kind] = {row[0]: (self._build(cls, row[1:]), now) for row in rows}
+        self._loaded_at = time.monotonic()
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return self.ttl is None or time.monotonic() - loaded_at < self.ttl
+
+    async def _reload(self, kind: str, guild_id: str):
+        table, cls = CONFIG_TABLES[kind]
+        columns = ", ".join(self._columns(cls))
+        row = await self.db.fetchone(f"SELECT {columns} FROM {table} WHERE guild_id = ?", (guild_id,))
+        config = self._build(cls, row) if row else cls()
+        self._entries[kind][guild_id] = (config, time.monotonic())
+        return config
+
+    async def get(self, kind: str, guild_id: str):
+        entry = self._entries[kind].get(guild_id)
+        if entry is not None:
+            if self._fresh(entry[1]):
+                return entry[0]
+        elif self._fresh(self._loaded_at):
+            # Absent du chargement initial → config par défaut, sans requête
+            return CONFIG_TABLES[kind][1]()
+        return await self._reload(kind, guild_id)
+
+    async def set(self, kind: str, guild_id: str, **values):
+        table, cls = CONFIG_TABLES[kind]
+        columns = list(values)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+        await self.db.execute(
+            f"INSERT INTO {table} (guild_id, {', '.join(columns)}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(guild_id) DO UPDATE SET {updates}",
+            (guild_id, *values.values())
+        )
+        current = await self.get(kind, guild_id)
+        config = replace(current, **{k: v for k, v in values.items() if hasattr(current, k)})
+        self._entries[kind][guild_id] = (config, time.monotonic())
+        return config
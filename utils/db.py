@@ -1,83 +1,372 @@
 # utils/db.py
 import aiosqlite
+import asyncio
+import contextlib
 import os
+import sqlite3
+import time
+from utils.migrations import MIGRATIONS
 
 DB_PATH = os.getenv("DATABASE_URL", "royal_bot.db")
+DB_READERS = int(os.getenv("DATABASE_READERS", "4"))
 
-async def init_db():
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Modération
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS moderation (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                mod_id TEXT NOT NULL,
-                action TEXT NOT NULL,
-                reason TEXT NOT NULL,
-                duration TEXT,
-                timestamp INTEGER NOT NULL,
-                active INTEGER DEFAULT 1
-            )
-        """)
+# Réglages appliqués à chaque connexion du pool
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA busy_timeout = 5000",
+)
 
-        # Avis
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS avis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                staff_id TEXT NOT NULL,
-                content TEXT NOT NULL,
-                stars REAL NOT NULL,
-                guild_id TEXT NOT NULL,
-                timestamp INTEGER NOT NULL
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS avis_config (
-                guild_id TEXT PRIMARY KEY,
-                staff_role_id TEXT,
-                avis_channel_id TEXT
-            )
-        """)
+# Nombre max d'écritures regroupées dans une seule transaction (un seul fsync)
+WRITE_BATCH = 64
+# Écritures différées (append) : flush dès AUDIT_BATCH lignes ou toutes les AUDIT_DELAY secondes
+AUDIT_BATCH = int(os.getenv("AUDIT_BATCH", "256"))
+AUDIT_DELAY = float(os.getenv("AUDIT_DELAY", "1.0"))
 
-        # Welcome
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS welcome_config (
-                guild_id TEXT PRIMARY KEY,
-                channel_id TEXT,
-                role_id TEXT
-            )
-        """)
+class Database:
+    """Pool SQLite partagé par tous les cogs (bot.db).
+
+    Les lectures passent par plusieurs connexions en WAL, les écritures par
+    une connexion unique alimentée par une file : plus de "database is locked".
+    Les lignes de journal (sanctions, avis) peuvent être ajoutées sans attendre
+    avec append() ; elles sont toujours écrites avant toute autre écriture ou
+    lecture, l'ordre reste donc celui des appels.
+    """
+
+    def __init__(self, path: str = DB_PATH, readers: int = DB_READERS):
+        self.path = path
+        self.readers_count = max(1, readers)
+        self._readers = None
+        self._all_readers = []
+        self._writer = None
+        self._writes = None
+        self._writer_task = None
+        self._pending = []
+        # Dernier lot de lignes différées remis au writer (pas forcément encore écrit)
+        self._last_flush = None
+        self._flush_soon = asyncio.Event()
+        self._flusher_task = None
+        self._closed = False
+
+    async def _open(self, **kwargs) -> aiosqlite.Connection:
+        # cached_statements : réutilisation des requêtes préparées par sqlite3
+        conn = await aiosqlite.connect(self.path, cached_statements=256, **kwargs)
+        for pragma in PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def connect(self):
+        if self._writer is not None:
+            return
+        # Autocommit : les transactions sont gérées à la main par _write_loop
+        self._writer = await self._open(isolation_level=None)
+        self._readers = asyncio.Queue()
+        for _ in range(self.readers_count):
+            conn = await self._open()
+            await conn.execute("PRAGMA query_only = ON")
+            self._all_readers.append(conn)
+            self._readers.put_nowait(conn)
+        self._writes = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
+        self._flusher_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._writer is None:
+            return
+        self._closed = True
+        # Les lignes encore en mémoire partent avant l'arrêt du writer
+        self._flusher_task.cancel()
+        self._enqueue_pending()
+        await self._writes.put(None)
+        await self._writer_task
+        for conn in self._all_readers:
+            await conn.close()
+        await self._writer.close()
+        self._all_readers.clear()
+        self._writer = None
+
+    # ---------- Lectures ----------
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        # Lire ses propres écritures : les lignes différées sont d'abord écrites,
+        # y compris celles déjà remises au writer mais pas encore validées
+        if self._pending:
+            self._enqueue_pending()
+        if self._last_flush is not None and not self._last_flush.done():
+            # Une erreur de flush est déjà signalée par _report_flush_error
+            await asyncio.wait((self._last_flush,))
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def fetchone(self, sql: str, params=()):
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, sql: str, params=()):
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchall()
+
+    # ---------- Écritures ----------
+    async def transaction(self, job):
+        """Exécute job(conn) dans une transaction de la connexion d'écriture."""
+        self._enqueue_pending()
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((job, future))
+        return await future
+
+    def append(self, sql: str, params=()):
+        """Écriture différée : retour immédiat, la ligne part au prochain flush."""
+        if self._closed:
+            raise RuntimeError("Base fermée : écriture différée impossible")
+        self._pending.append((sql, params))
+        if len(self._pending) >= AUDIT_BATCH:
+            self._flush_soon.set()
+
+    async def flush(self):
+        future = self._enqueue_pending()
+        if future is not None:
+            await asyncio.shield(future)
+
+    def _enqueue_pending(self):
+        if not self._pending:
+            return None
+        rows, self._pending = self._pending, []
+        # Lignes consécutives de même requête → un seul executemany
+        groups = []
+        for sql, params in rows:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+
+        async def job(conn):
+            for sql, seq in groups:
+                await conn.execute("SAVEPOINT rows")
+                try:
+                    await conn.executemany(sql, seq)
+                except sqlite3.Error:
+                    # Une ligne invalide ne doit pas faire perdre les autres
+                    await conn.execute("ROLLBACK TO rows")
+                    for params in seq:
+                        try:
+                            await conn.execute(sql, params)
+                        except sqlite3.Error as e:
+                            print(f"❌ Écriture différée perdue : {e} ({params})")
+                await conn.execute("RELEASE rows")
 
-        # Tickets
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_report_flush_error)
+        self._writes.put_nowait((job, future))
+        self._last_flush = future
+        return future
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_soon.wait(), timeout=AUDIT_DELAY)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_soon.clear()
+            self._enqueue_pending()
+
+    async def execute(self, sql: str, params=()) -> int:
+        async def job(conn):
+            cursor = await conn.execute(sql, params)
+            return cursor.rowcount
+        return await self.transaction(job)
+
+    async def execute_returning(self, sql: str, params=()):
+        async def job(conn):
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+        return await self.transaction(job)
+
+    async def executemany(self, sql: str, seq) -> int:
+        rows = list(seq)
+
+        async def job(conn):
+            cursor = await conn.executemany(sql, rows)
+            return cursor.rowcount
+        return await self.transaction(job)
+
+    async def _write_loop(self):
+        conn = self._writer
+        while True:
+            item = await self._writes.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < WRITE_BATCH and not self._writes.empty():
+                nxt = self._writes.get_nowait()
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            # Commit groupé : chaque job a son SAVEPOINT, une erreur n'annule que lui
+            results = []
+            try:
+                await conn.execute("BEGIN IMMEDIATE")
+                for job, future in batch:
+                    await conn.execute("SAVEPOINT job")
+                    try:
+                        result = await job(conn)
+                        await conn.execute("RELEASE job")
+                        results.append((future, result, None))
+                    except Exception as e:
+                        await conn.execute("ROLLBACK TO job")
+                        await conn.execute("RELEASE job")
+                        results.append((future, None, e))
+                await conn.execute("COMMIT")
+            except Exception as e:
+                with contextlib.suppress(Exception):
+                    await conn.execute("ROLLBACK")
+                results = [(future, None, e) for _, future in batch]
+
+            for future, result, error in results:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            if stop:
+                return
+
+def _report_flush_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"❌ Échec du flush des écritures différées : {future.exception()}")
+
+async def schema_version(db: Database) -> int:
+    try:
+        row = await db.fetchone("SELECT MAX(version) FROM schema_version")
+    except sqlite3.OperationalError:
+        # Table absente : base neuve ou antérieure aux migrations
+        return 0
+    return row[0] or 0
+
+async def init_db(db: Database) -> int:
+    """Applique les migrations manquantes, chacune dans sa propre transaction.
+
+    Sur une base à jour, le démarrage se limite à une lecture de schema_version.
+    """
+    start = time.perf_counter()
+    current = await schema_version(db)
+    pending = [m for m in MIGRATIONS if m[0] > current]
+
+    if pending:
         await db.execute("""
-            CREATE TABLE IF NOT EXISTS ticket_categories (
-                guild_id TEXT NOT NULL,
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
                 name TEXT NOT NULL,
-                PRIMARY KEY (guild_id, name)
+                applied_at INTEGER NOT NULL
             )
         """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS ticket_config (
-                guild_id TEXT PRIMARY KEY,
-                ping_role_id TEXT,
-                ticket_counter INTEGER DEFAULT 1
+    for version, name, steps in pending:
+        async def job(conn, version=version, name=name, steps=steps):
+            for step in steps:
+                if isinstance(step, str):
+                    await conn.execute(step)
+                else:
+                    await step(conn)
+            await conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, int(time.time()))
             )
-        """)
+        await db.transaction(job)
+        print(f"🗄️ Migration {version} appliquée : {name}")
+        current = version
 
-        # Sécurité
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS security_config (
-                guild_id TEXT PRIMARY KEY,
-                anti_spam INTEGER DEFAULT 0,
-                anti_links INTEGER DEFAULT 0,
-                logs_spam TEXT,
-                logs_links TEXT,
-                logs_messages TEXT,
-                logs_vocal TEXT,
-                logs_suspect TEXT,
-                logs_admin TEXT
-            )
-        """)
+    print(f"🗄️ Base v{current} prête en {(time.perf_counter() - start) * 1000:.1f} ms")
+    return current
+
+async def get_state(db: Database, key: str):
+    row = await db.fetchone("SELECT value FROM bot_state WHERE key = ?", (key,))
+    return row[0] if row else None
+
+async def set_state(db: Database, key: str, value: str):
+    await db.execute(
+        "INSERT INTO bot_state (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value)
+    )
+
+async def next_ticket_number(db: Database, guild_id: str) -> int:
+    """Alloue le prochain numéro de ticket en une seule requête atomique."""
+    row = await db.execute_returning(
+        "INSERT INTO ticket_config (guild_id, ticket_counter) VALUES (?, 2) "
+        "ON CONFLICT(guild_id) DO UPDATE SET ticket_counter = ticket_counter + 1 "
+        "RETURNING ticket_counter - 1",
+        (guild_id,)
+    )
+    return row[0]
+
+async def moderation_page(db: Database, guild_id: str, action: str = None, user_id: str = None,
+                          before=None, limit: int = 10):
+    """Une page de sanctions, de la plus récente à la plus ancienne.
+
+    Pagination par clé (keyset) : before = (timestamp, id) de la dernière ligne
+    de la page précédente, donc le coût ne dépend pas de la taille de la table.
+    """
+    sql = "SELECT id, user_id, mod_id, action, reason, duration, timestamp FROM moderation WHERE guild_id = ?"
+    params = [guild_id]
+    if action:
+        sql += " AND action = ? AND active = 1"
+        params.append(action)
+    if user_id:
+        sql += " AND user_id = ?"
+        params.append(user_id)
+    if before:
+        sql += " AND (timestamp, id) < (?, ?)"
+        params.extend(before)
+    sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+    return await db.fetchall(sql, params)
+
+async def avis_stats(db: Database, guild_id: str, staff_id: str, days: int = None):
+    """(nombre, moyenne, histogramme {bucket: nombre}, dernier avis) d'un staff.
+
+    Servi par les tables d'agrégats : le coût ne dépend pas du nombre d'avis.
+    Avec days, seuls les jours de la période sont additionnés.
+    """
+    if days:
+        row = await db.fetchone(
+            "SELECT SUM(count), SUM(total) FROM avis_daily WHERE guild_id = ? AND staff_id = ? AND day >= ?",
+            (guild_id, staff_id, int(time.time()) // 86400 - days + 1)
+        )
+        buckets = {}
+    else:
+        row = await db.fetchone(
+            "SELECT count, total FROM avis_stats WHERE guild_id = ? AND staff_id = ?", (guild_id, staff_id)
+        )
+        rows = await db.fetchall(
+            "SELECT bucket, count FROM avis_buckets WHERE guild_id = ? AND staff_id = ? AND count > 0",
+            (guild_id, staff_id)
+        )
+        buckets = dict(rows)
+    count, total = row if row and row[0] else (0, 0.0)
+    last = await db.fetchone(
+        "SELECT MAX(timestamp) FROM avis WHERE guild_id = ? AND staff_id = ?", (guild_id, staff_id)
+    )
+    return count, (total / count if count else 0.0), buckets, last[0]
 
-        await db.commit()
\ No newline at end of file
+async def avis_leaderboard(db: Database, guild_id: str, days: int = None, min_count: int = 1, limit: int = 10):
+    """Classement (staff_id, nombre, moyenne) par moyenne puis nombre d'avis."""
+    if days:
+        sql = ("SELECT staff_id, SUM(count) AS n, SUM(total) / SUM(count) AS avg FROM avis_daily "
+               "WHERE guild_id = ? AND day >= ? GROUP BY staff_id")
+        params = [guild_id, int(time.time()) // 86400 - days + 1]
+    else:
+        sql = "SELECT staff_id, count AS n, total / count AS avg FROM avis_stats WHERE guild_id = ?"
+        params = [guild_id]
+    sql = f"SELECT * FROM ({sql}) WHERE n >= ? ORDER BY avg DESC, n DESC LIMIT ?"
+    params.extend((max(1, min_count), limit))
+    return await db.fetchall(sql, params)
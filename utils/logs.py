@@ -0,0 +1,131 @@
+# utils/logs.py
+import asyncio
+import discord
+import os
+
+# Fenêtre de regroupement par salon de logs (secondes)
+LOG_WINDOW = float(os.getenv("LOG_WINDOW", "2"))
+# Messages max envoyés par fenêtre et par salon : 2 toutes les 2 s reste sous
+# la limite Discord de 5 messages / 5 s par salon
+LOG_MAX_MESSAGES = int(os.getenv("LOG_MAX_MESSAGES", "2"))
+# Fenêtres plus longues (récapitulatifs vocaux) : même débit, plafonné
+LOG_MAX_BURST = int(os.getenv("LOG_MAX_BURST", "30"))
+# Entrées gardées en attente par salon ; au-delà elles sont seulement comptées
+LOG_MAX_QUEUE = int(os.getenv("LOG_MAX_QUEUE", "200"))
+MESSAGE_CHARS = 1900
+# Les membres cités peuvent être notifiés, jamais un rôle ni @everyone
+LOG_MENTIONS = discord.AllowedMentions(everyone=False, roles=False, users=True)
+
+def pack_lines(lines: list, max_messages: int, dropped: int = 0):
+    """Regroupe les entrées en messages de moins de 2000 caractères ; ce qui
+    dépasse max_messages est résumé en fin du dernier message.
+    Retourne (messages, nombre d'entrées non affichées)."""
+    messages, current, size = [], [], 0
+    for index, line in enumerate(lines):
+        line = line[:MESSAGE_CHARS]
+        if "\n" in line:
+            line += "\n"  # Entrées sur plusieurs lignes : séparées par une ligne vide
+        if current and size + len(line) + 1 > MESSAGE_CHARS:
+            messages.append("\n".join(current))
+            current, size = [], 0
+            if len(messages) == max_messages:
+                dropped += len(lines) - index
+                break
+        current.append(line)
+        size += len(line) + 1
+    else:
+        if current:
+            messages.append("\n".join(current))
+    if dropped and messages:
+        messages[-1] += f"\n➕ {dropped} autres entrées non affichées"
+    return messages, dropped
+
+class LogDispatcher:
+    """Envoi groupé vers les salons de logs (bot.logs).
+
+    Chaque salon a sa file : les entrées reçues pendant la fenêtre partent
+    ensemble en quelques messages, envoyés un par un (LOG_MAX_MESSAGES par
+    fenêtre par défaut, proportionnellement plus pour une fenêtre longue comme
+    les récapitulatifs vocaux). En cas de vague, le surplus est résumé
+    au lieu de saturer la limite d'envoi du salon.
+    """
+
+    def __init__(self, bot, window: float = LOG_WINDOW, max_messages: int = LOG_MAX_MESSAGES,
+                 max_queue: int = LOG_MAX_QUEUE, max_burst: int = LOG_MAX_BURST):
+        self.bot = bot
+        self.window = window
+        self.max_messages = max_messages
+        self.max_burst = max_burst
+        self.max_queue = max_queue
+        self._queues = {}    # salon → entrées en attente
+        self._dropped = {}   # salon → entrées écartées (file pleine)
+        self._tasks = {}     # salon → tâche d'envoi
+
+        # Statistiques
+        self.entries = 0
+        self.messages_sent = 0
+        self.dropped = 0
+
+    def send(self, channel_id, content: str, window: float = None):
+        """Ajoute une entrée (texte, éventuellement multi-lignes) pour ce salon."""
+        if not channel_id:
+            return
+        channel_id = int(channel_id)
+        self.entries += 1
+        queue = self._queues.setdefault(channel_id, [])
+        if len(queue) < self.max_queue:
+            queue.append(content)
+        else:
+            self._dropped[channel_id] = self._dropped.get(channel_id, 0) + 1
+            self.dropped += 1
+        if channel_id not in self._tasks:
+            self._tasks[channel_id] = asyncio.create_task(self._run(channel_id, window or self.window))
+
+    def budget(self, window: float) -> int:
+        """Messages permis pour une fenêtre : max_messages par window par défaut,
+        au même débit pour une fenêtre plus longue (au plus max_burst)."""
+        scaled = int(self.max_messages * window / self.window)
+        return max(self.max_messages, min(scaled, self.max_burst))
+
+    async def _run(self, channel_id: int, window: float):
+        max_messages = self.budget(window)
+        try:
+            while self._queues.get(channel_id) or self._dropped.get(channel_id):
+                await asyncio.sleep(window)
+                await self._flush(channel_id, max_messages)
+        finally:
+            self._tasks.pop(channel_id, None)
+
+    async def _flush(self, channel_id: int, max_messages: int = None):
+        entries = self._queues.pop(channel_id, [])
+        dropped = self._dropped.pop(channel_id, 0)
+        if not entries:
+            return
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+        messages, omitted = pack_lines(entries, max_messages or self.max_messages, dropped)
+        # Les entrées écartées file pleine sont déjà comptées dans send()
+        self.dropped += omitted - dropped
+        for content in messages:
+            try:
+                await channel.send(content, allowed_mentions=LOG_MENTIONS)
+            except Exception as e:
+                print(f"❌ Log non envoyé dans {channel_id} : {e}")
+                return
+            self.messages_sent += 1
+
+    async def close(self):
+        # Vide toutes les files avant l'arrêt
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for channel_id in list(self._queues):
+            await self._flush(channel_id)
+
+    def stats(self) -> dict:
+        return {
+            "entries": self.entries,
+            "messages_sent": self.messages_sent,
+            "dropped": self.dropped,
+            "pending": sum(len(q) for q in self._queues.values()),
+        }
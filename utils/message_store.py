@@ -0,0 +1,141 @@
+# utils/message_store.py
+import os
+import sys
+from collections import OrderedDict
+
+# Plafond par salon (modifiable par serveur avec /logs_messages) et plafond global
+MESSAGE_CACHE_KB = int(os.getenv("MESSAGE_CACHE_KB", "256"))
+MESSAGE_STORE_MAX_MB = int(os.getenv("MESSAGE_STORE_MAX_MB", "64"))
+# Coût fixe estimé d'une entrée (objet à slots + entrée de l'OrderedDict)
+RECORD_OVERHEAD = 256
+
+class CachedMessage:
+    __slots__ = ("id", "author_id", "content", "attachments", "created_at", "size")
+
+    def __init__(self, id: int, author_id: int, content: str, attachments: tuple, created_at: int):
+        self.id = id
+        self.author_id = author_id
+        self.content = content
+        self.attachments = attachments
+        self.created_at = created_at
+        self.size = RECORD_OVERHEAD + sys.getsizeof(content) + sum(sys.getsizeof(a) for a in attachments)
+
+class ChannelBuffer:
+    __slots__ = ("messages", "bytes", "limit")
+
+    def __init__(self, limit: int):
+        self.messages = OrderedDict()
+        self.bytes = 0
+        self.limit = limit
+
+class MessageStore:
+    """Contenu des messages récents, par salon, borné en octets.
+
+    Sert aux logs de suppression/modification sans dépendre du cache de
+    discord.py ni d'appels REST. Quand le plafond global est atteint, ce
+    sont les salons les moins actifs qui perdent leurs plus vieux messages.
+    """
+
+    def __init__(self, channel_bytes: int = MESSAGE_CACHE_KB * 1024,
+                 max_bytes: int = MESSAGE_STORE_MAX_MB * 1024 * 1024):
+        self.channel_bytes = channel_bytes
+        self.max_bytes = max_bytes
+        self._channels = OrderedDict()   # salon → ChannelBuffer, du moins au plus actif
+        self.bytes = 0
+
+        # Statistiques
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def add(self, message, channel_bytes: int = None):
+        record = CachedMessage(
+            message.id,
+            message.author.id,
+            message.content,
+            tuple(att.filename for att in message.attachments),
+            int(message.created_at.timestamp())
+        )
+        channel = self._channels.get(message.channel.id)
+        if channel is None:
+            channel = self._channels[message.channel.id] = ChannelBuffer(channel_bytes or self.channel_bytes)
+        else:
+            self._channels.move_to_end(message.channel.id)
+            if channel_bytes:
+                channel.limit = channel_bytes
+        channel.messages[record.id] = record
+        channel.bytes += record.size
+        self.bytes += record.size
+        self._trim(channel)
+
+    def _trim(self, channel: ChannelBuffer):
+        while channel.bytes > channel.limit and channel.messages:
+            self._evict(channel)
+        # Plafond global : on prend sur le salon le moins récemment actif
+        while self.bytes > self.max_bytes and self._channels:
+            channel_id, oldest = next(iter(self._channels.items()))
+            if oldest.messages:
+                self._evict(oldest)
+            if not oldest.messages:
+                del self._channels[channel_id]
+
+    def _evict(self, channel: ChannelBuffer):
+        _, record = channel.messages.popitem(last=False)
+        channel.bytes -= record.size
+        self.bytes -= record.size
+        self.evicted += 1
+
+    def get(self, channel_id: int, message_id: int):
+        channel = self._channels.get(channel_id)
+        record = channel.messages.get(message_id) if channel else None
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def edit(self, channel_id: int, message_id: int, content: str):
+        """Remplace le contenu ; retourne l'ancien (None si inconnu)."""
+        record = self.get(channel_id, message_id)
+        if record is None:
+            return None
+        old = record.content
+        channel = self._channels[channel_id]
+        delta = sys.getsizeof(content) - sys.getsizeof(old)
+        record.content = content
+        record.size += delta
+        channel.bytes += delta
+        self.bytes += delta
+        self._trim(channel)
+        return old
+
+    def pop(self, channel_id: int, message_id: int):
+        channel = self._channels.get(channel_id)
+        record = channel.messages.pop(message_id, None) if channel else None
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        channel.bytes -= record.size
+        self.bytes -= record.size
+        return record
+
+    def pop_many(self, channel_id: int, message_ids) -> list:
+        records = (self.pop(channel_id, message_id) for message_id in message_ids)
+        return sorted((r for r in records if r is not None), key=lambda r: r.id)
+
+    def drop_channel(self, channel_id: int):
+        channel = self._channels.pop(channel_id, None)
+        if channel is not None:
+            self.bytes -= channel.bytes
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "channels": len(self._channels),
+            "messages": sum(len(c.messages) for c in self._channels.values()),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,254 @@
+# utils/migrations.py
+# Migrations numérotées, appliquées une seule fois chacune par utils.db.init_db.
+# Ne jamais modifier une migration publiée : en ajouter une nouvelle à la fin.
+
+def add_column(table: str, column: str, decl: str):
+    """ALTER TABLE ADD COLUMN qui ne fait rien si la colonne existe déjà
+    (bases mises à jour à la main avant l'arrivée des migrations)."""
+    async def step(conn):
+        async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+            existing = {row[1] async for row in cursor}
+        if column not in existing:
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return step
+
+MIGRATIONS = (
+    (1, "schéma initial", (
+        # Modération
+        """
+        CREATE TABLE IF NOT EXISTS moderation (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            mod_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            duration TEXT,
+            timestamp INTEGER NOT NULL,
+            active INTEGER DEFAULT 1
+        )
+        """,
+        # Avis
+        """
+        CREATE TABLE IF NOT EXISTS avis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            staff_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            stars REAL NOT NULL,
+            guild_id TEXT NOT NULL,
+            timestamp INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS avis_config (
+            guild_id TEXT PRIMARY KEY,
+            staff_role_id TEXT,
+            avis_channel_id TEXT
+        )
+        """,
+        # Welcome
+        """
+        CREATE TABLE IF NOT EXISTS welcome_config (
+            guild_id TEXT PRIMARY KEY,
+            channel_id TEXT,
+            role_id TEXT
+        )
+        """,
+        # Tickets
+        """
+        CREATE TABLE IF NOT EXISTS ticket_categories (
+            guild_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            PRIMARY KEY (guild_id, name)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ticket_config (
+            guild_id TEXT PRIMARY KEY,
+            ping_role_id TEXT,
+            ticket_counter INTEGER DEFAULT 1
+        )
+        """,
+        # Sécurité
+        """
+        CREATE TABLE IF NOT EXISTS security_config (
+            guild_id TEXT PRIMARY KEY,
+            anti_spam INTEGER DEFAULT 0,
+            anti_links INTEGER DEFAULT 0,
+            logs_spam TEXT,
+            logs_links TEXT,
+            logs_messages TEXT,
+            logs_vocal TEXT,
+            logs_suspect TEXT,
+            logs_admin TEXT
+        )
+        """,
+    )),
+    (2, "sécurité : anti-liens global/salon et règles", (
+        add_column("security_config", "anti_links_global", "INTEGER DEFAULT 0"),
+        add_column("security_config", "anti_links_salon", "TEXT"),
+        add_column("security_config", "link_rules", "TEXT"),
+    )),
+    (3, "welcome : mode groupé", (
+        add_column("welcome_config", "batch_mode", "INTEGER DEFAULT 0"),
+    )),
+    (4, "modération : guild_id et index", (
+        add_column("moderation", "guild_id", "TEXT"),
+        # Listes /banlist, /warnlist : filtre + tri servis par l'index
+        "CREATE INDEX IF NOT EXISTS idx_moderation_guild_action ON moderation (guild_id, action, active, timestamp)",
+        # Historique d'un membre
+        "CREATE INDEX IF NOT EXISTS idx_moderation_guild_user ON moderation (guild_id, user_id)",
+    )),
+    (5, "modération : échéance des sanctions temporaires", (
+        add_column("moderation", "expires_at", "INTEGER"),
+        # Seules les sanctions actives et temporaires sont indexées
+        "CREATE INDEX IF NOT EXISTS idx_moderation_expiry ON moderation (expires_at) "
+        "WHERE active = 1 AND expires_at IS NOT NULL",
+    )),
+    (6, "avis : statistiques agrégées", (
+        "CREATE INDEX IF NOT EXISTS idx_avis_guild_staff ON avis (guild_id, staff_id, timestamp)",
+        # Agrégats tenus à jour par trigger : lecture en temps constant
+        """
+        CREATE TABLE IF NOT EXISTS avis_stats (
+            guild_id TEXT NOT NULL,
+            staff_id TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (guild_id, staff_id)
+        ) WITHOUT ROWID
+        """,
+        # Histogramme par demi-étoile (bucket 1 = 0.5 ⭐ … 10 = 5 ⭐)
+        """
+        CREATE TABLE IF NOT EXISTS avis_buckets (
+            guild_id TEXT NOT NULL,
+            staff_id TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, staff_id, bucket)
+        ) WITHOUT ROWID
+        """,
+        # Une ligne par jour (UTC) pour les stats sur une période
+        """
+        CREATE TABLE IF NOT EXISTS avis_daily (
+            guild_id TEXT NOT NULL,
+            staff_id TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (guild_id, day, staff_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS avis_stats_insert AFTER INSERT ON avis BEGIN
+            INSERT INTO avis_stats (guild_id, staff_id, count, total)
+            VALUES (NEW.guild_id, NEW.staff_id, 1, NEW.stars)
+            ON CONFLICT (guild_id, staff_id) DO UPDATE SET count = count + 1, total = total + excluded.total;
+            INSERT INTO avis_buckets (guild_id, staff_id, bucket, count)
+            VALUES (NEW.guild_id, NEW.staff_id, MIN(10, MAX(1, CAST(ROUND(NEW.stars * 2) AS INTEGER))), 1)
+            ON CONFLICT (guild_id, staff_id, bucket) DO UPDATE SET count = count + 1;
+            INSERT INTO avis_daily (guild_id, staff_id, day, count, total)
+            VALUES (NEW.guild_id, NEW.staff_id, NEW.timestamp / 86400, 1, NEW.stars)
+            ON CONFLICT (guild_id, day, staff_id) DO UPDATE SET count = count + 1, total = total + excluded.total;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS avis_stats_delete AFTER DELETE ON avis BEGIN
+            UPDATE avis_stats SET count = count - 1, total = total - OLD.stars
+            WHERE guild_id = OLD.guild_id AND staff_id = OLD.staff_id;
+            UPDATE avis_buckets SET count = count - 1
+            WHERE guild_id = OLD.guild_id AND staff_id = OLD.staff_id
+              AND bucket = MIN(10, MAX(1, CAST(ROUND(OLD.stars * 2) AS INTEGER)));
+            UPDATE avis_daily SET count = count - 1, total = total - OLD.stars
+            WHERE guild_id = OLD.guild_id AND staff_id = OLD.staff_id AND day = OLD.timestamp / 86400;
+        END
+        """,
+        # Reprise des avis déjà enregistrés
+        """
+        INSERT INTO avis_stats (guild_id, staff_id, count, total)
+        SELECT guild_id, staff_id, COUNT(*), SUM(stars) FROM avis GROUP BY guild_id, staff_id
+        """,
+        """
+        INSERT INTO avis_buckets (guild_id, staff_id, bucket, count)
+        SELECT guild_id, staff_id, MIN(10, MAX(1, CAST(ROUND(stars * 2) AS INTEGER))) AS b, COUNT(*)
+        FROM avis GROUP BY guild_id, staff_id, b
+        """,
+        """
+        INSERT INTO avis_daily (guild_id, staff_id, day, count, total)
+        SELECT guild_id, staff_id, timestamp / 86400 AS d, COUNT(*), SUM(stars)
+        FROM avis GROUP BY guild_id, staff_id, d
+        """,
+    )),
+    (7, "statistiques d'activité", (
+        # Même structure pour les trois granularités ; bucket = début de la période (epoch)
+        """
+        CREATE TABLE IF NOT EXISTS stats_minute (
+            guild_id TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            channel_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            messages INTEGER NOT NULL DEFAULT 0,
+            voice_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, bucket, channel_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stats_hour (
+            guild_id TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            channel_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            messages INTEGER NOT NULL DEFAULT 0,
+            voice_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, bucket, channel_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stats_day (
+            guild_id TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            channel_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            messages INTEGER NOT NULL DEFAULT 0,
+            voice_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, bucket, channel_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        # Stats d'un membre sur une période
+        "CREATE INDEX IF NOT EXISTS idx_stats_hour_user ON stats_hour (guild_id, user_id, bucket)",
+        "CREATE INDEX IF NOT EXISTS idx_stats_day_user ON stats_day (guild_id, user_id, bucket)",
+    )),
+    (8, "état du bot (hash des commandes synchronisées)", (
+        """
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """,
+    )),
+    (9, "sécurité : taille du cache des logs de messages", (
+        add_column("security_config", "message_cache_kb", "INTEGER"),
+    )),
+    (10, "sessions vocales", (
+        """
+        CREATE TABLE IF NOT EXISTS voice_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            channel_id TEXT NOT NULL,
+            joined_at INTEGER NOT NULL,
+            left_at INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_voice_sessions_user ON voice_sessions (guild_id, user_id, joined_at)",
+    )),
+    (11, "anti-spam : purge des messages récents", (
+        add_column("security_config", "spam_purge_minutes", "INTEGER"),
+    )),
+    (12, "statistiques : index de rétention", (
+        # La purge horaire (DELETE ... WHERE bucket < ?) ne parcourt plus toute la table
+        "CREATE INDEX IF NOT EXISTS idx_stats_minute_bucket ON stats_minute (bucket)",
+        "CREATE INDEX IF NOT EXISTS idx_stats_hour_bucket ON stats_hour (bucket)",
+    )),
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
@@ -0,0 +1,148 @@
+# utils/scanner.py
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+from typing import Optional, Tuple
+
+@dataclass(frozen=True)
+class ScanRules:
+    """Règles anti-liens d'un serveur (stockées en JSON dans security_config.link_rules)."""
+    schemes: Tuple[str, ...] = ("http", "https")
+    block_www: bool = True
+    invite_domains: Tuple[str, ...] = ("discord.gg", "discord.com/invite", "discordapp.com/invite")
+    blocked_extensions: Tuple[str, ...] = ("gif", "mp4", "webm", "mov", "avi", "mkv", "exe", "bat", "dll")
+    allowed_attachments: Tuple[str, ...] = ("txt", "png", "jpg", "jpeg")
+    allowed_domains: Tuple[str, ...] = ()
+    block_embeds: bool = True
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> "ScanRules":
+        if not raw:
+            return DEFAULT_RULES
+        data = json.loads(raw)
+        values = {}
+        for key, value in data.items():
+            if key in cls.__dataclass_fields__:
+                values[key] = tuple(value) if isinstance(value, list) else value
+        return cls(**values)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    def toggle(self, field: str, value: str, enabled: bool) -> "ScanRules":
+        current = [v for v in getattr(self, field) if v != value]
+        if enabled:
+            current.append(value)
+        return replace(self, **{field: tuple(current)})
+
+DEFAULT_RULES = ScanRules()
+
+class ContentScanner:
+    """Un seul motif compilé pour toutes les règles, parcouru en une passe."""
+
+    def __init__(self, rules: ScanRules = DEFAULT_RULES):
+        self.rules = rules
+        self.allowed_domains = tuple(d.lower() for d in rules.allowed_domains)
+        self.allowed_attachments = tuple(f".{ext.lower()}" for ext in rules.allowed_attachments)
+
+        prefixes = [f"{re.escape(s)}://" for s in rules.schemes]
+        if rules.block_www:
+            prefixes.append(r"www\.")
+        parts = []
+        if prefixes:
+            # Le lien complet est capturé pour tester la liste blanche et les invitations
+            parts.append(rf"(?P<link>(?:{'|'.join(prefixes)})(?P<host>[^\s/?#<>]+)(?P<path>[^\s<>]*))")
+        if rules.invite_domains:
+            invites = "|".join(re.escape(d) for d in rules.invite_domains)
+            parts.append(rf"(?P<invite>(?<![\w.])(?:{invites}))")
+        if rules.blocked_extensions:
+            extensions = "|".join(re.escape(e) for e in rules.blocked_extensions)
+            parts.append(rf"(?P<extension>\.(?:{extensions})(?![a-z0-9]))")
+        # Préfiltre sur le premier caractère possible : évite de tester chaque
+        # alternative à chaque position du message
+        first = {s[0].lower() for s in rules.schemes if s}
+        if rules.block_www:
+            first.add("w")
+        first.update(d[0].lower() for d in rules.invite_domains if d)
+        if rules.blocked_extensions:
+            first.add(".")
+        lead = "(?=[" + "".join(re.escape(c) for c in sorted(first)) + "])"
+        self.pattern = re.compile(f"{lead}(?:{'|'.join(parts)})", re.IGNORECASE) if parts else None
+        self.invite_pattern = (
+            re.compile("|".join(re.escape(d) for d in rules.invite_domains), re.IGNORECASE)
+            if rules.invite_domains else None
+        )
+
+    def _allowed_host(self, host: str) -> bool:
+        host = host.lower().split("@")[-1].split(":")[0]
+        if host.startswith("www."):
+            host = host[4:]
+        return any(host == d or host.endswith("." + d) for d in self.allowed_domains)
+
+    def scan(self, content: str, embeds: int = 0, attachments=()) -> Optional[Tuple[str, str]]:
+        """Retourne (règle, extrait) pour le premier contenu interdit, sinon None."""
+        if self.pattern is not None and content:
+            for match in self.pattern.finditer(content):
+                kind = match.lastgroup
+                if kind == "link":
+                    link = match.group("link")
+                    if self.invite_pattern is not None and self.invite_pattern.search(link):
+                        return "invite", link
+                    if self.allowed_domains and self._allowed_host(match.group("host")):
+                        continue
+                    return "link", link
+                return kind, match.group(kind)
+        if embeds and self.rules.block_embeds:
+            return "embed", "[Embed]"
+        for filename in attachments:
+            if not filename.lower().endswith(self.allowed_attachments):
+                return "attachment", filename
+        return None
+
+@lru_cache(maxsize=256)
+def get_scanner(rules: ScanRules = DEFAULT_RULES) -> ContentScanner:
+    # Les serveurs aux règles identiques partagent le même motif compilé
+    return ContentScanner(rules)
+
+# ========== MICRO-BENCHMARK (python -m utils.scanner) ==========
+CORPUS = (
+    "salut tout le monde, quelqu'un pour une session RP ce soir ?",
+    "je suis en service à la police, appelez si besoin",
+    "regarde ça https://youtube.com/watch?v=dQw4w9WgXcQ",
+    "rejoins notre serveur discord.gg/abcdef",
+    "www.site-douteux.ru/free-nitro",
+    "t'as vu le clip.mp4 que j'ai posté ?",
+    "lol",
+    "le patron du garage a dit de venir demain vers 18h pour les réparations",
+    "https://discord.com/invite/royalrp",
+    "quelqu'un a le lien du règlement ? il est dans #règles normalement",
+) * 100
+
+def _legacy_scan(content: str, attachments=()) -> bool:
+    # Ancienne implémentation de contains_forbidden_content, pour comparaison
+    if re.search(r'https?://|www\.|discord\.(gg|com/invite)', content, re.IGNORECASE):
+        return True
+    for name in attachments:
+        if not name.lower().endswith(('.txt', '.png', '.jpg', '.jpeg')):
+            return True
+    if re.search(r'\.(gif|mp4|webm|mov|avi|mkv|exe|bat|dll)', content, re.IGNORECASE):
+        return True
+    return False
+
+def benchmark(rounds: int = 20):
+    scanner = get_scanner()
+    results = {}
+    for name, func in (("legacy", _legacy_scan), ("scanner", scanner.scan)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for content in CORPUS:
+                func(content)
+        elapsed = time.perf_counter() - start
+        results[name] = rounds * len(CORPUS) / elapsed
+    return results
+
+if __name__ == "__main__":
+    for name, rate in benchmark().items():
+        print(f"{name:>8} : {rate:,.0f} messages/s")
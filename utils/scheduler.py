@@ -0,0 +1,124 @@
+# utils/scheduler.py
+import asyncio
+import heapq
+import time
+
+# Nombre max d'échéances traitées par réveil
+BATCH_SIZE = 100
+# Délai avant nouvel essai quand la levée d'une sanction échoue
+RETRY_DELAY = 60
+
+class SanctionScheduler:
+    """Levée automatique des sanctions temporaires (ban, mute).
+
+    Les échéances sont stockées dans moderation.expires_at et rechargées dans
+    un tas au démarrage ; une seule tâche dort jusqu'à la plus proche, lève
+    en lot tout ce qui est échu puis marque les lignes inactives en une
+    transaction. Après un redémarrage, les échéances dépassées partent au
+    premier réveil, une fois le bot prêt (serveurs en cache).
+    """
+
+    def __init__(self, db, handlers: dict, ready=None):
+        self.db = db
+        # action → coroutine(guild_id, user_id) ; True = levée effectuée
+        self.handlers = handlers
+        # Coroutine attendue avant le premier passage (ex. bot.wait_until_ready)
+        self.ready = ready
+        self._heap = []
+        # Échéance valide par (serveur, membre, action) ; les entrées du tas
+        # qui ne correspondent plus sont ignorées (annulation paresseuse)
+        self._live = {}
+        self._wake = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        rows = await self.db.fetchall(
+            "SELECT guild_id, user_id, action, MAX(expires_at) FROM moderation "
+            "WHERE active = 1 AND expires_at IS NOT NULL AND guild_id IS NOT NULL "
+            "GROUP BY guild_id, user_id, action"
+        )
+        for guild_id, user_id, action, expires_at in rows:
+            self._live[(guild_id, user_id, action)] = expires_at
+            self._heap.append((expires_at, guild_id, user_id, action))
+        heapq.heapify(self._heap)
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def schedule(self, guild_id: str, user_id: str, action: str, expires_at: int):
+        key = (guild_id, user_id, action)
+        self._live[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, guild_id, user_id, action))
+        # Nouvelle échéance en tête : la tâche doit raccourcir son sommeil
+        if self._heap[0][0] == expires_at:
+            self._wake.set()
+
+    def cancel(self, guild_id: str, user_id: str, action: str):
+        self._live.pop((guild_id, user_id, action), None)
+
+    def pending(self, action: str = None) -> int:
+        if action is None:
+            return len(self._live)
+        return sum(1 for key in self._live if key[2] == action)
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < BATCH_SIZE:
+            expires_at, guild_id, user_id, action = heapq.heappop(self._heap)
+            key = (guild_id, user_id, action)
+            if self._live.get(key) != expires_at:
+                continue
+            del self._live[key]
+            due.append((expires_at, guild_id, user_id, action))
+        return due
+
+    async def _run(self):
+        if self.ready is not None:
+            await self.ready()
+        while True:
+            # Vider les entrées annulées en tête pour connaître la vraie échéance
+            while self._heap and self._live.get(self._heap[0][1:]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self._pop_due(time.time())
+            if due:
+                await self._expire(due)
+
+    async def _expire(self, due: list):
+        results = await asyncio.gather(
+            *(self._lift(guild_id, user_id, action) for _, guild_id, user_id, action in due),
+            return_exceptions=True
+        )
+        done = []
+        for (expires_at, guild_id, user_id, action), ok in zip(due, results):
+            if ok is True:
+                done.append((guild_id, user_id, action, expires_at))
+            elif (guild_id, user_id, action) not in self._live:
+                self.schedule(guild_id, user_id, action, int(time.time()) + RETRY_DELAY)
+        if done:
+            # "+" : force l'index (guild_id, user_id), bien plus sélectif que (guild_id, action)
+            await self.db.executemany(
+                "UPDATE moderation SET active = 0 "
+                "WHERE guild_id = ? AND user_id = ? AND +action = ? AND +active = 1 AND expires_at <= ?",
+                done
+            )
+
+    async def _lift(self, guild_id: str, user_id: str, action: str) -> bool:
+        handler = self.handlers.get(action)
+        if handler is None:
+            return True
+        return await handler(guild_id, user_id)